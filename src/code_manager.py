@@ -1,20 +1,65 @@
-from pathlib import Path
+import asyncio
+from pathlib import Path, PurePath
 import logging
 from typing import Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 import ast
-import autopep8
+import hashlib
+import sys
 from datetime import datetime
 
+from src.utils.plan_steps import run_plan
+
+# File suffixes formatted with autopep8
+PY_SUFFIXES = {'.py'}
+# Maximum number of file analyses kept in memory
+ANALYSIS_CACHE_SIZE = 64
+# Maximum number of autopep8 results kept in memory
+FORMAT_CACHE_SIZE = 64
+# Files larger than this (in characters) are only partially printed
+MAX_DISPLAY_SIZE = 8192
+PREVIEW_SIZE = 2048
+
+# Worker processes used for autopep8, created on first use
+_FORMAT_POOL = None
+
+def _get_format_pool() -> ProcessPoolExecutor:
+    """Get the shared autopep8 process pool"""
+    global _FORMAT_POOL
+    if _FORMAT_POOL is None:
+        # The assistant already runs several threads by the time the pool
+        # starts, and forking a threaded process can deadlock the child
+        _FORMAT_POOL = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+    return _FORMAT_POOL
+
+def _discard_format_pool(pool: ProcessPoolExecutor):
+    """Forget a broken autopep8 pool so the next call creates a new one"""
+    global _FORMAT_POOL
+    if _FORMAT_POOL is pool:
+        _FORMAT_POOL = None
+
+def shutdown_format_pool():
+    """Stop the autopep8 worker processes"""
+    global _FORMAT_POOL
+    if _FORMAT_POOL is not None:
+        _FORMAT_POOL.shutdown(wait=False, cancel_futures=True)
+        _FORMAT_POOL = None
+
 class CodeManager:
     def __init__(self, project_manager):
         """Initialize CodeManager with a ProjectManager instance"""
         self.project_manager = project_manager
         self.logger = logging.getLogger(__name__)
+        self._analysis_cache: OrderedDict = OrderedDict()
+        self._format_cache: OrderedDict = OrderedDict()
 
     async def execute_action(self, plan: Dict[str, Any]):
         """Execute a code-related action plan"""
         try:
-            self.logger.info(f"Executing code action: {plan['description']}")
+            self.logger.info("Executing code action: %s", plan['description'])
             
             # Ensure we have a current project
             current_project = self.project_manager.get_current_project()
@@ -22,22 +67,25 @@ class CodeManager:
                 print("\n⚠️ No project loaded. Please create or load a project first.")
                 return
 
-            for step in plan["steps"]:
-                if step["type"] == "create_file":
-                    file_name = step["params"]["file_name"]
-                    content = plan.get("code", "")
-                    await self.create_file(file_name, content)
-                elif step["type"] == "modify_file":
-                    await self.modify_file(plan["file_path"], step["params"])
-                elif step["type"] == "analyze_code":
-                    await self.analyze_code(plan["file_path"])
+            await run_plan(plan["steps"], lambda step: self._execute_step(plan, step))
                     
-            self.logger.info(f"Code action completed: {plan['description']}")
+            self.logger.info("Code action completed: %s", plan['description'])
         
         except Exception as e:
-            self.logger.error(f"Error executing code action: {e}")
+            self.logger.error("Error executing code action: %s", e)
             raise
 
+    async def _execute_step(self, plan: Dict[str, Any], step: Dict[str, Any]):
+        """Execute a single step of a code action plan"""
+        if step["type"] == "create_file":
+            file_name = step["params"]["file_name"]
+            content = plan.get("code", "")
+            await self.create_file(file_name, content)
+        elif step["type"] == "modify_file":
+            await self.modify_file(plan["file_path"], step["params"])
+        elif step["type"] == "analyze_code":
+            await self.analyze_code(plan["file_path"])
+
     async def create_file(self, file_name: str, content: str = ""):
         """Create a new file with the given content"""
         try:
@@ -45,35 +93,35 @@ class CodeManager:
             if not current_project:
                 raise ValueError("No project currently loaded")
 
-            # Determine the correct subdirectory based on file type
-            if file_name.endswith('.py'):
-                base_dir = current_project / "src"
-            elif file_name.endswith('_test.py') or file_name.startswith('test_'):
+            # Determine the correct subdirectory based on file type: Python
+            # test modules (test_*.py / *_test.py) go to tests, the rest to src
+            name = PurePath(file_name)
+            is_python = name.suffix in PY_SUFFIXES
+            if is_python and (name.name.startswith('test_') or name.stem.endswith('_test')):
                 base_dir = current_project / "tests"
             else:
                 base_dir = current_project / "src"  # default to src
 
             # Create full path
-            full_path = base_dir / file_name
+            full_path = base_dir / name
             
             # Create parent directories if they don't exist
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(full_path.parent.mkdir, parents=True, exist_ok=True)
             
-            # Add default content if file is empty
+            # Add default content if file is empty. The stub is comments only,
+            # so there is nothing for autopep8 to fix.
             if not content:
                 content = f"""# Created by CodeMe Assistant
 # Project: {current_project.name}
 # Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
 """
-            
-            # Format the code if it's a Python file
-            if full_path.suffix == '.py':
-                content = autopep8.fix_code(content)
+            elif is_python:
+                # Format the code if it's a Python file
+                content = await self._format_code(content)
             
             # Write the file
-            full_path.write_text(content)
-            self.logger.info(f"Created file: {full_path}")
+            await asyncio.to_thread(full_path.write_text, content)
+            self.logger.info("Created file: %s", full_path)
             
             # Track the file in the project
             self.project_manager.add_file_to_project(full_path)
@@ -82,7 +130,7 @@ class CodeManager:
             return full_path
             
         except Exception as e:
-            self.logger.error(f"Error creating file: {e}")
+            self.logger.error("Error creating file: %s", e)
             raise
 
     async def modify_file(self, file_path: str, modifications: Dict[str, Any]):
@@ -102,7 +150,7 @@ class CodeManager:
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             # Read existing content
-            content = full_path.read_text()
+            content = await asyncio.to_thread(full_path.read_text)
             
             # Apply modifications
             if modifications.get("append"):
@@ -113,16 +161,16 @@ class CodeManager:
                 content = modifications["replace"]
             
             # Format Python files
-            if full_path.suffix == '.py':
-                content = autopep8.fix_code(content)
+            if full_path.suffix in PY_SUFFIXES:
+                content = await self._format_code(content)
             
             # Write back to file
-            full_path.write_text(content)
-            self.logger.info(f"Modified file: {full_path}")
+            await asyncio.to_thread(full_path.write_text, content)
+            self.logger.info("Modified file: %s", full_path)
             print(f"\n✅ Modified file: {full_path}")
             
         except Exception as e:
-            self.logger.error(f"Error modifying file: {e}")
+            self.logger.error("Error modifying file: %s", e)
             raise
 
     async def analyze_code(self, file_path: str) -> Dict[str, Any]:
@@ -133,30 +181,95 @@ class CodeManager:
                 raise ValueError("No project currently loaded")
 
             full_path = current_project / file_path
-            content = full_path.read_text()
-            
-            # Parse the code
-            tree = ast.parse(content)
-            
-            # Analyze structure
-            analysis = {
-                "classes": len([n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]),
-                "functions": len([n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]),
-                "imports": len([n for n in ast.walk(tree) if isinstance(n, ast.Import) or isinstance(n, ast.ImportFrom)]),
-                "lines": len(content.splitlines()),
-                "content": content
-            }
+
+            # Reuse the previous analysis if the file is unchanged
+            stat = await asyncio.to_thread(full_path.stat)
+            cache_key = (str(full_path), stat.st_mtime_ns, stat.st_size)
+            analysis = self._analysis_cache.get(cache_key)
+            if analysis is not None:
+                self._analysis_cache.move_to_end(cache_key)
+            else:
+                # Empty files need neither a read nor a parse
+                content = await asyncio.to_thread(full_path.read_text) if stat.st_size else ""
+                analysis = self._analyze_content(content)
+                self._analysis_cache[cache_key] = analysis
+                if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    self._analysis_cache.popitem(last=False)
+
+            analysis = dict(analysis)
+            content = analysis["content"]
             
-            print(f"\n📊 Code Analysis for {file_path}:")
-            print(f"  Lines of code: {analysis['lines']}")
-            print(f"  Classes: {analysis['classes']}")
-            print(f"  Functions: {analysis['functions']}")
-            print(f"  Imports: {analysis['imports']}")
-            print("\n📝 File Contents:")
-            print(f"\n{content}")
+            # Large files are shown as a head/tail preview
+            if len(content) > MAX_DISPLAY_SIZE:
+                content = (
+                    f"{content[:PREVIEW_SIZE]}\n... [truncated] ...\n{content[-PREVIEW_SIZE:]}"
+                )
+
+            report = "\n".join([
+                f"\n📊 Code Analysis for {file_path}:",
+                f"  Lines of code: {analysis['lines']}",
+                f"  Classes: {analysis['classes']}",
+                f"  Functions: {analysis['functions']}",
+                f"  Imports: {analysis['imports']}",
+                "\n📝 File Contents:",
+                f"\n{content}\n"
+            ])
+            await asyncio.to_thread(sys.stdout.write, report)
             
             return analysis
             
         except Exception as e:
-            self.logger.error(f"Error analyzing code: {e}")
-            raise
\ No newline at end of file
+            self.logger.error("Error analyzing code: %s", e)
+            raise
+
+    async def _format_code(self, content: str) -> str:
+        """Format Python code with autopep8, reusing previous results"""
+        content_hash = hashlib.sha1(content.encode()).hexdigest()
+        formatted = self._format_cache.get(content_hash)
+        if formatted is not None:
+            self._format_cache.move_to_end(content_hash)
+            return formatted
+
+        # autopep8 is CPU-bound pure Python, so run it in another process.
+        # It is imported here to keep it out of the assistant's startup path.
+        import autopep8
+        loop = asyncio.get_running_loop()
+        pool = _get_format_pool()
+        try:
+            formatted = await loop.run_in_executor(pool, autopep8.fix_code, content)
+        except BrokenProcessPool:
+            # Let the next call start a fresh pool instead of failing forever
+            _discard_format_pool(pool)
+            raise
+        self._format_cache[content_hash] = formatted
+        if len(self._format_cache) > FORMAT_CACHE_SIZE:
+            self._format_cache.popitem(last=False)
+        return formatted
+
+    def _analyze_content(self, content: str) -> Dict[str, Any]:
+        """Parse source code and collect structure metrics"""
+        tree = ast.parse(content)
+
+        # Analyze structure in a single pass over the tree
+        classes = functions = imports = 0
+        for node in ast.walk(tree):
+            node_type = type(node)
+            if node_type is ast.ClassDef:
+                classes += 1
+            elif node_type is ast.FunctionDef:
+                functions += 1
+            elif node_type is ast.Import or node_type is ast.ImportFrom:
+                imports += 1
+
+        # Count lines without building a list (matches splitlines())
+        lines = content.count("\n")
+        if content and not content.endswith("\n"):
+            lines += 1
+
+        return {
+            "classes": classes,
+            "functions": functions,
+            "imports": imports,
+            "lines": lines,
+            "content": content
+        }
\ No newline at end of file
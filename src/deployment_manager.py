@@ -1,41 +1,74 @@
 import asyncio
 from pathlib import Path
 import logging
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List, Optional, Tuple
+import functools
+import os
+import shlex
 import shutil
 import subprocess
-import docker
+from collections import deque
 from datetime import datetime
 
+from src.utils import json_utils
+from src.utils.file_utils import fast_copy
+from src.utils.plan_steps import run_plan
+
+# Number of past deployments kept per environment
+STATUS_HISTORY_SIZE = 5
+
+@functools.lru_cache(maxsize=256)
+def _tokenize(cmd: str) -> Tuple[str, ...]:
+    """Split a configured command into arguments, honouring shell quoting.
+
+    POSIX quoting would strip the backslashes from Windows paths, so plain
+    whitespace splitting is kept there.
+    """
+    if os.name == "nt":
+        return tuple(cmd.split())
+    return tuple(shlex.split(cmd))
+
+def _stage_path(source: Path, dest: Path):
+    """Copy a file or directory tree into the build directory"""
+    if source.is_dir():
+        shutil.copytree(source, dest, copy_function=fast_copy, dirs_exist_ok=True)
+    else:
+        fast_copy(source, dest)
+
 class DeploymentManager:
     def __init__(self, project_root: str):
         self.project_root = Path(project_root)
         self.logger = logging.getLogger(__name__)
         self.config_path = self.project_root / "deployments" / "deployment_config.json"
+        self.status_file = self.project_root / "deployments" / "status.json"
+        self._status_cache = None
+        self._status_mtime = None
+        self._dirs_created = set()
+        self._proc_sem = asyncio.Semaphore(max(4, os.cpu_count() or 1))
+        # Docker client is created on first use, see _get_docker_client()
         self.docker_client = None
-        try:
-            self.docker_client = docker.from_env()
-        except:
-            self.logger.warning("Docker not available. Container deployments disabled.")
+        self._docker_checked = False
 
     async def execute_action(self, action_plan: Dict[str, Any]):
         """Execute a deployment-related action plan"""
         try:
-            for step in action_plan["steps"]:
-                if step["type"] == "build":
-                    await self.build_project(step["params"])
-                elif step["type"] == "deploy":
-                    await self.deploy(step["params"])
-                elif step["type"] == "rollback":
-                    await self.rollback(step["params"])
-                elif step["type"] == "status":
-                    await self.get_deployment_status()
+            await run_plan(action_plan["steps"], self._execute_step)
                     
         except Exception as e:
-            self.logger.error(f"Error executing deployment action: {e}")
+            self.logger.error("Error executing deployment action: %s", e)
             raise
 
+    async def _execute_step(self, step: Dict[str, Any]):
+        """Execute a single step of a deployment action plan"""
+        if step["type"] == "build":
+            await self.build_project(step["params"])
+        elif step["type"] == "deploy":
+            await self.deploy(step["params"])
+        elif step["type"] == "rollback":
+            await self.rollback(step["params"])
+        elif step["type"] == "status":
+            await self.get_deployment_status()
+
     async def build_project(self, params: Dict[str, Any]):
         """Build the project for deployment"""
         try:
@@ -43,38 +76,25 @@ class DeploymentManager:
             build_dir = self.project_root / "build"
             build_dir.mkdir(exist_ok=True)
             
-            # Copy project files
+            # Copy project files concurrently
+            build_commands = params.get("commands", [])
             deploy_files = params.get("files", ["src", "requirements.txt"])
-            for file in deploy_files:
-                source = self.project_root / file
-                dest = build_dir / file
-                if source.is_dir():
-                    shutil.copytree(source, dest, dirs_exist_ok=True)
-                else:
-                    shutil.copy2(source, dest)
+            await asyncio.gather(*[
+                asyncio.to_thread(_stage_path, self.project_root / file, build_dir / file)
+                for file in deploy_files
+            ])
 
             # Run build commands
-            build_commands = params.get("commands", [])
-            for cmd in build_commands:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd.split(),
-                    cwd=str(build_dir),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"Build command failed: {stderr.decode()}")
+            await self._run_commands(build_commands, build_dir, "Build")
                 
             # Create Docker image if specified
-            if params.get("create_docker_image") and self.docker_client:
+            if params.get("create_docker_image") and self._get_docker_client():
                 await self._create_docker_image(build_dir, params.get("docker_tag", "latest"))
                 
             self.logger.info("Build completed successfully")
             
         except Exception as e:
-            self.logger.error(f"Build failed: {e}")
+            self.logger.error("Build failed: %s", e)
             raise
 
     async def deploy(self, params: Dict[str, Any]):
@@ -91,12 +111,19 @@ class DeploymentManager:
             # Create deployment directory
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             deploy_dir = self.project_root / "deployments" / environment / timestamp
-            deploy_dir.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(deploy_dir.parent)
+            try:
+                deploy_dir.mkdir(exist_ok=True)
+            except FileNotFoundError:
+                # deployments/<env> was removed after it was first created
+                self._dirs_created.discard(deploy_dir.parent)
+                self._ensure_dir(deploy_dir.parent)
+                deploy_dir.mkdir(exist_ok=True)
             
             # Copy build artifacts
             build_dir = self.project_root / "build"
             if build_dir.exists():
-                shutil.copytree(build_dir, deploy_dir, dirs_exist_ok=True)
+                shutil.copytree(build_dir, deploy_dir, copy_function=fast_copy, dirs_exist_ok=True)
             
             # Run deployment steps
             if env_config.get("type") == "docker":
@@ -112,10 +139,10 @@ class DeploymentManager:
                 "path": str(deploy_dir)
             })
             
-            self.logger.info(f"Deployment to {environment} completed successfully")
+            self.logger.info("Deployment to %s completed successfully", environment)
             
         except Exception as e:
-            self.logger.error(f"Deployment failed: {e}")
+            self.logger.error("Deployment failed: %s", e)
             raise
 
     async def rollback(self, params: Dict[str, Any]):
@@ -125,11 +152,9 @@ class DeploymentManager:
             version = params.get("version")
             
             # Get deployment history
-            status_file = self.project_root / "deployments" / "status.json"
-            if not status_file.exists():
+            status = self._read_status()
+            if status is None:
                 raise FileNotFoundError("No deployment history found")
-                
-            status = json.loads(status_file.read_text())
             
             if environment not in status:
                 raise ValueError(f"No deployments found for environment: {environment}")
@@ -171,27 +196,41 @@ class DeploymentManager:
                 "rollback": True
             })
             
-            self.logger.info(f"Rollback completed successfully")
+            self.logger.info("Rollback completed successfully")
             
         except Exception as e:
-            self.logger.error(f"Rollback failed: {e}")
+            self.logger.error("Rollback failed: %s", e)
             raise
 
     async def get_deployment_status(self) -> Dict[str, Any]:
         """Get current deployment status"""
         try:
-            status_file = self.project_root / "deployments" / "status.json"
-            if status_file.exists():
-                return json.loads(status_file.read_text())
-            return {}
+            # Return a detached copy with plain lists; the cached status is
+            # internal and keeps its history in deques
+            status = self._read_status() or {}
+            return {
+                env: {**env_status, "history": list(env_status["history"])}
+                for env, env_status in status.items()
+            }
         except Exception as e:
-            self.logger.error(f"Error getting deployment status: {e}")
+            self.logger.error("Error getting deployment status: %s", e)
             raise
 
+    def _get_docker_client(self):
+        """Connect to Docker on first use; returns None if it is unavailable"""
+        if not self._docker_checked:
+            self._docker_checked = True
+            try:
+                import docker
+                self.docker_client = docker.from_env()
+            except:
+                self.logger.warning("Docker not available. Container deployments disabled.")
+        return self.docker_client
+
     async def _create_docker_image(self, build_dir: Path, tag: str):
         """Create Docker image from build directory"""
         try:
-            if not self.docker_client:
+            if not self._get_docker_client():
                 raise Exception("Docker not available")
                 
             dockerfile = build_dir / "Dockerfile"
@@ -204,33 +243,29 @@ class DeploymentManager:
                 rm=True
             )
             
-            self.logger.info(f"Docker image created: {tag}")
+            self.logger.info("Docker image created: %s", tag)
             
         except Exception as e:
-            self.logger.error(f"Error creating Docker image: {e}")
+            self.logger.error("Error creating Docker image: %s", e)
             raise
 
     async def _deploy_docker(self, env_config: Dict[str, Any], params: Dict[str, Any]):
         """Deploy using Docker"""
         try:
-            if not self.docker_client:
+            if not self._get_docker_client():
                 raise Exception("Docker not available")
                 
-            # Pull image if specified
+            # Pull image unless the local copy is up to date
             image = env_config.get("image", params.get("version", "latest"))
-            self.docker_client.images.pull(image)
+            await asyncio.to_thread(self._ensure_image, image, env_config.get("always_pull", False))
             
             # Stop existing container
             container_name = env_config.get("container_name")
-            try:
-                container = self.docker_client.containers.get(container_name)
-                container.stop()
-                container.remove()
-            except:
-                pass
+            await asyncio.to_thread(self._remove_container, container_name)
             
             # Start new container
-            self.docker_client.containers.run(
+            await asyncio.to_thread(
+                self.docker_client.containers.run,
                 image,
                 name=container_name,
                 detach=True,
@@ -238,84 +273,163 @@ class DeploymentManager:
                 environment=env_config.get("environment", {})
             )
             
-            self.logger.info(f"Docker deployment completed: {image}")
+            self.logger.info("Docker deployment completed: %s", image)
             
         except Exception as e:
-            self.logger.error(f"Docker deployment failed: {e}")
+            self.logger.error("Docker deployment failed: %s", e)
             raise
 
+    def _ensure_image(self, image: str, always_pull: bool = False):
+        """Pull a Docker image unless the local copy matches the registry.
+
+        Tags like "latest" can move, so the local image's repo digests are
+        compared with the digest the registry currently serves for the tag.
+        """
+        from docker.errors import APIError, ImageNotFound
+
+        if not always_pull:
+            try:
+                local_image = self.docker_client.images.get(image)
+            except ImageNotFound:
+                local_image = None
+            if local_image is not None:
+                if "@" in image:
+                    # Pinned by digest, so the local copy can't be stale
+                    self.logger.info("Using local Docker image: %s", image)
+                    return
+                try:
+                    remote_digest = self.docker_client.images.get_registry_data(image).id
+                except APIError as e:
+                    # Registry unreachable or image is local-only
+                    self.logger.warning("Could not check registry for %s, using local image: %s", image, e)
+                    return
+                local_digests = local_image.attrs.get("RepoDigests") or []
+                if any(digest.endswith("@" + remote_digest) for digest in local_digests):
+                    self.logger.info("Using local Docker image: %s", image)
+                    return
+        self.docker_client.images.pull(image)
+
+    def _remove_container(self, container_name: str):
+        """Stop and remove an existing container, if any"""
+        try:
+            container = self.docker_client.containers.get(container_name)
+            container.stop()
+            container.remove()
+        except:
+            pass
+
     async def _deploy_standard(self, deploy_dir: Path, env_config: Dict[str, Any], params: Dict[str, Any]):
         """Deploy using standard file copy and commands"""
         try:
             # Run pre-deploy commands
-            for cmd in env_config.get("pre_deploy_commands", []):
-                process = await asyncio.create_subprocess_exec(
-                    *cmd.split(),
-                    cwd=str(deploy_dir),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"Pre-deploy command failed: {stderr.decode()}")
+            await self._run_commands(
+                env_config.get("pre_deploy_commands", []),
+                deploy_dir,
+                "Pre-deploy",
+                parallel=env_config.get("parallel_pre_deploy", False)
+            )
             
             # Copy to deployment location
             deploy_location = env_config.get("location")
             if deploy_location:
                 deploy_path = Path(deploy_location)
-                deploy_path.mkdir(parents=True, exist_ok=True)
-                shutil.copytree(deploy_dir, deploy_path, dirs_exist_ok=True)
+                self._ensure_dir(deploy_path)
+                shutil.copytree(deploy_dir, deploy_path, copy_function=fast_copy, dirs_exist_ok=True)
             
             # Run post-deploy commands
-            for cmd in env_config.get("post_deploy_commands", []):
-                process = await asyncio.create_subprocess_exec(
-                    *cmd.split(),
-                    cwd=str(deploy_location if deploy_location else deploy_dir),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"Post-deploy command failed: {stderr.decode()}")
+            await self._run_commands(
+                env_config.get("post_deploy_commands", []),
+                deploy_location if deploy_location else deploy_dir,
+                "Post-deploy",
+                parallel=env_config.get("parallel_post_deploy", False)
+            )
             
             self.logger.info("Standard deployment completed successfully")
             
         except Exception as e:
-            self.logger.error(f"Standard deployment failed: {e}")
+            self.logger.error("Standard deployment failed: %s", e)
             raise
 
+    async def _run_cmd(self, cmd: str, cwd, label: str, capture: bool = False) -> Optional[bytes]:
+        """Run a single command, raising if it exits with a non-zero status.
+
+        stdout is discarded unless capture is set; stderr is always kept for
+        the error message. The number of concurrent processes is capped.
+        """
+        async with self._proc_sem:
+            process = await asyncio.create_subprocess_exec(
+                *_tokenize(cmd),
+                cwd=str(cwd),
+                stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            raise Exception(f"{label} command failed: {stderr.decode()}")
+        return stdout
+
+    async def _run_commands(self, commands: List[str], cwd, label: str, parallel: bool = False):
+        """Run commands in order, or all at once when they are independent"""
+        if parallel:
+            await asyncio.gather(*[self._run_cmd(cmd, cwd, label) for cmd in commands])
+        else:
+            for cmd in commands:
+                await self._run_cmd(cmd, cwd, label)
+
+    def _ensure_dir(self, path: Path):
+        """Create a directory (and parents) once per manager instance"""
+        if path in self._dirs_created:
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        self._dirs_created.add(path)
+
     def _load_deployment_config(self) -> Dict[str, Any]:
         """Load deployment configuration"""
         if not self.config_path.exists():
             raise FileNotFoundError("Deployment configuration not found")
-        return json.loads(self.config_path.read_text())
+        return json_utils.read_json(self.config_path)
+
+    def _read_status(self) -> Optional[Dict[str, Any]]:
+        """Load deployment status, reusing the parsed copy while the file is unchanged"""
+        try:
+            mtime = self.status_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._status_cache = None
+            self._status_mtime = None
+            return None
+
+        if self._status_cache is None or mtime != self._status_mtime:
+            status = json_utils.read_json(self.status_file)
+            for env_status in status.values():
+                env_status["history"] = deque(env_status["history"], maxlen=STATUS_HISTORY_SIZE)
+            self._status_cache = status
+            self._status_mtime = mtime
+        return self._status_cache
 
     def _update_deployment_status(self, environment: str, deployment_info: Dict[str, Any]):
         """Update deployment status file"""
         try:
-            status_file = self.project_root / "deployments" / "status.json"
-            status = {}
-            
-            if status_file.exists():
-                status = json.loads(status_file.read_text())
+            status = self._read_status()
+            if status is None:
+                status = {}
             
             if environment not in status:
-                status[environment] = {"current": None, "history": []}
+                status[environment] = {"current": None, "history": deque(maxlen=STATUS_HISTORY_SIZE)}
             
             # Update current deployment
             status[environment]["current"] = deployment_info
             
-            # Add to history
+            # Add to history; the deque keeps only the last few deployments
             status[environment]["history"].append(deployment_info)
             
-            # Keep only last 5 deployments in history
-            status[environment]["history"] = status[environment]["history"][-5:]
-            
             # Save status file
-            status_file.write_text(json.dumps(status, indent=2))
+            json_utils.write_json(self.status_file, status, default=list, atomic=True)
+            self._status_cache = status
+            self._status_mtime = self.status_file.stat().st_mtime_ns
             
         except Exception as e:
-            self.logger.error(f"Error updating deployment status: {e}")
+            # The cached copy may have been mutated without being saved
+            self._status_cache = None
+            self.logger.error("Error updating deployment status: %s", e)
             raise
\ No newline at end of file
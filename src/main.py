@@ -2,6 +2,7 @@ import sys
 import os
 from pathlib import Path
 import asyncio
+import signal
 from dotenv import load_dotenv
 import logging
 
@@ -14,6 +15,7 @@ load_dotenv()
 
 from src.utils.config_loader import load_config
 from src.voice_assistant import VoiceCodingAssistant
+from src.code_manager import shutdown_format_pool
 from src.utils.logger import setup_logger
 
 # Global assistant instance for cleanup
@@ -24,6 +26,7 @@ async def shutdown():
     global assistant
     if assistant:
         await assistant.stop()
+    shutdown_format_pool()
     
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
     [task.cancel() for task in tasks]
@@ -52,13 +55,25 @@ async def main():
         wake_word=config["wake_word"]
     )
     
+    # Wake up only when asked to stop instead of polling
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Not supported on Windows; Ctrl+C raises KeyboardInterrupt there
+            pass
+    
     try:
-        # Start the assistant
-        await assistant.start()
+        # Run the assistant until it exits or a stop signal arrives
+        assistant_task = asyncio.create_task(assistant.start())
+        stop_task = asyncio.create_task(stop_event.wait())
+        await asyncio.wait({assistant_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
         
-        # Keep running until interrupted
-        while True:
-            await asyncio.sleep(0.1)
+        if assistant_task.done():
+            assistant_task.result()
+        logger.info("Shutting down...")
             
     except KeyboardInterrupt:
         logger.info("Shutting down...")
@@ -76,6 +91,4 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        if assistant:
-            asyncio.run(shutdown())
         print("Shutdown complete")
\ No newline at end of file
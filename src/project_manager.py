@@ -5,6 +5,46 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 import os
+import sys
+import atexit
+import weakref
+import threading
+import functools
+import time
+
+from src.utils import json_utils
+from src.utils.file_utils import parallel_copytree
+
+logger = logging.getLogger(__name__)
+
+class _SafeNameTable(dict):
+    """str.translate table mapping non-alphanumeric characters to "_".
+
+    Entries are filled in on first lookup, so non-ASCII characters are
+    handled the same way as ASCII ones.
+    """
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        value = char if char.isalnum() else "_"
+        self[codepoint] = value
+        return value
+
+_SAFE_NAME_TABLE = _SafeNameTable()
+
+# Seconds to wait before writing changed projects metadata
+SAVE_DELAY = 0.25
+# Maximum number of path safety check results kept in memory
+SAFE_PATH_CACHE_SIZE = 4096
+
+# Managers whose pending metadata is written at exit; held weakly so
+# registering doesn't keep a manager alive
+_live_managers = weakref.WeakSet()
+
+@atexit.register
+def _flush_all():
+    """Write pending projects metadata of every live ProjectManager"""
+    for manager in list(_live_managers):
+        manager.flush()
 
 class ProjectManager:
     def __init__(self, base_dir: str):
@@ -13,64 +53,101 @@ class ProjectManager:
         self.projects_dir.mkdir(exist_ok=True)
         self.backups_dir = self.base_dir / "backups"
         self.backups_dir.mkdir(exist_ok=True)
+        # Resolved once; used by every path safety check
+        self._projects_resolved = self.projects_dir.resolve()
+        self._backups_resolved = self.backups_dir.resolve()
+        # Path safety results, keyed by path string
+        self._safe_path_cache = functools.lru_cache(maxsize=SAFE_PATH_CACHE_SIZE)(self._check_safe_path)
         self.current_project = None
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
         self.projects_file = self.base_dir / "projects.json"
         self.projects_data = self._load_projects_data()
+        self._dirty = False
+        self._save_timer = None
+        # Guards projects_data against the delayed save running on a timer thread
+        self._save_lock = threading.RLock()
+        _live_managers.add(self)
 
         # Log initialization
-        self.logger.info(f"ProjectManager initialized:")
-        self.logger.info(f"Base directory: {self.base_dir}")
-        self.logger.info(f"Projects directory: {self.projects_dir}")
-        self.logger.info(f"Backups directory: {self.backups_dir}")
+        self.logger.info("ProjectManager initialized:")
+        self.logger.info("Base directory: %s", self.base_dir)
+        self.logger.info("Projects directory: %s", self.projects_dir)
+        self.logger.info("Backups directory: %s", self.backups_dir)
 
     def _is_safe_path(self, path: Path) -> bool:
         """Verify that a path is within the projects directory"""
+        return self._safe_path_cache(str(path))
+
+    def _check_safe_path(self, path: str) -> bool:
+        """Resolve a path and check it is within the projects or backups directory"""
         try:
-            resolved_path = path.resolve()
-            projects_resolved = self.projects_dir.resolve()
-            backups_resolved = self.backups_dir.resolve()
+            resolved_path = Path(path).resolve()
             
             # Check if path is within projects or backups directory
-            is_in_projects = projects_resolved in resolved_path.parents
-            is_in_backups = backups_resolved in resolved_path.parents
+            parents = resolved_path.parents
+            is_in_projects = self._projects_resolved in parents
+            is_in_backups = self._backups_resolved in parents
             
             # Log path verification
-            self.logger.debug(f"Path safety check - Path: {path}")
-            self.logger.debug(f"Is in projects: {is_in_projects}")
-            self.logger.debug(f"Is in backups: {is_in_backups}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Path safety check - Path: %s", path)
+                self.logger.debug("Is in projects: %s", is_in_projects)
+                self.logger.debug("Is in backups: %s", is_in_backups)
             
             return is_in_projects or is_in_backups
         except (ValueError, RuntimeError) as e:
-            self.logger.error(f"Path safety check failed: {e}")
+            self.logger.error("Path safety check failed: %s", e)
             return False
 
+    def _safe_name(self, name: str) -> str:
+        """Sanitize a project name for use as a directory name"""
+        return name.translate(_SAFE_NAME_TABLE)
+
     def _load_projects_data(self) -> Dict:
         """Load projects metadata"""
         if self.projects_file.exists():
             try:
-                return json.loads(self.projects_file.read_text())
+                return json_utils.read_json(self.projects_file)
             except json.JSONDecodeError as e:
-                self.logger.error(f"Error loading projects data: {e}")
+                self.logger.error("Error loading projects data: %s", e)
                 return {"projects": {}, "last_accessed": None}
         return {"projects": {}, "last_accessed": None}
 
     def _save_projects_data(self):
-        """Save projects metadata"""
-        try:
-            with open(self.projects_file, 'w') as f:
-                json.dump(self.projects_data, f, indent=2)
-            self.logger.info("Projects data saved successfully")
-        except Exception as e:
-            self.logger.error(f"Error saving projects data: {e}")
-            raise
+        """Schedule a save of projects metadata.
+
+        Saves are coalesced: the file is written once, SAVE_DELAY seconds
+        after the first unsaved change, on flush() or at exit.
+        """
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """Write pending projects metadata changes to disk"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            try:
+                json_utils.write_json(self.projects_file, self.projects_data, indent=True, atomic=True)
+                self._dirty = False
+                self.logger.info("Projects data saved successfully")
+            except Exception as e:
+                self.logger.error("Error saving projects data: %s", e)
+                raise
 
     def create_project(self, name: str, description: str = "") -> Path:
         """Create a new project"""
-        self.logger.info(f"Creating project: {name}")
+        self.logger.info("Creating project: %s", name)
         
         # Sanitize project name
-        safe_name = "".join(c if c.isalnum() else "_" for c in name)
+        safe_name = self._safe_name(name)
         project_dir = self.projects_dir / safe_name
         
         # Safety check
@@ -94,26 +171,27 @@ class ProjectManager:
             print(f"\n📁 Creating project in: {project_dir}")
             
             # Create project config
+            now = datetime.now().isoformat()
             project_config = {
                 "name": name,
                 "description": description,
-                "created_at": datetime.now().isoformat(),
-                "last_accessed": datetime.now().isoformat(),
+                "created_at": now,
+                "last_accessed": now,
                 "files": [],
                 "path": str(project_dir)
             }
             
             # Save project config
-            with open(project_dir / "project.json", "w") as f:
-                json.dump(project_config, indent=2, fp=f)
+            json_utils.write_json(project_dir / "project.json", project_config, indent=True)
             
             # Update projects data
-            self.projects_data["projects"][safe_name] = project_config
-            self.projects_data["last_accessed"] = safe_name
-            self._save_projects_data()
+            with self._save_lock:
+                self.projects_data["projects"][safe_name] = project_config
+                self.projects_data["last_accessed"] = safe_name
+                self._save_projects_data()
             
             self.current_project = project_dir
-            self.logger.info(f"Project created successfully: {project_dir}")
+            self.logger.info("Project created successfully: %s", project_dir)
             
             # Print project structure
             self.show_project_structure(project_dir)
@@ -121,7 +199,7 @@ class ProjectManager:
             return project_dir
             
         except Exception as e:
-            self.logger.error(f"Error creating project: {e}")
+            self.logger.error("Error creating project: %s", e)
             # Cleanup if needed
             if project_dir.exists():
                 shutil.rmtree(project_dir)
@@ -129,9 +207,9 @@ class ProjectManager:
 
     def load_project(self, name: str) -> Path:
         """Load an existing project"""
-        self.logger.info(f"Loading project: {name}")
+        self.logger.info("Loading project: %s", name)
         
-        safe_name = "".join(c if c.isalnum() else "_" for c in name)
+        safe_name = self._safe_name(name)
         project_dir = self.projects_dir / safe_name
         
         if not project_dir.exists():
@@ -147,10 +225,11 @@ class ProjectManager:
         
         try:
             # Update last accessed
-            if safe_name in self.projects_data["projects"]:
-                self.projects_data["projects"][safe_name]["last_accessed"] = datetime.now().isoformat()
-                self.projects_data["last_accessed"] = safe_name
-                self._save_projects_data()
+            with self._save_lock:
+                if safe_name in self.projects_data["projects"]:
+                    self.projects_data["projects"][safe_name]["last_accessed"] = datetime.now().isoformat()
+                    self.projects_data["last_accessed"] = safe_name
+                    self._save_projects_data()
             
             self.current_project = project_dir
             print(f"\n📂 Loaded project: {project_dir}")
@@ -161,29 +240,35 @@ class ProjectManager:
             return project_dir
             
         except Exception as e:
-            self.logger.error(f"Error loading project: {e}")
+            self.logger.error("Error loading project: %s", e)
             raise
 
     def show_project_structure(self, project_dir: Path):
         """Display project directory structure"""
-        print("\n📁 Project Structure:")
+        lines = ["\n📁 Project Structure:"]
         
-        def print_tree(directory: Path, prefix: str = "", is_last: bool = True):
-            print(prefix + ("└── " if is_last else "├── ") + directory.name)
+        # Depth-first walk with an explicit stack; directory entries carry
+        # their path, files carry None
+        stack = [(str(project_dir), project_dir.name, "", True)]
+        while stack:
+            path, name, prefix, is_last = stack.pop()
+            lines.append(prefix + ("└── " if is_last else "├── ") + name)
+            if path is None:
+                continue
             
-            # Get all items in directory
-            items = list(directory.iterdir())
-            items = [item for item in items if not item.name.startswith('.')]
-            items.sort(key=lambda x: (not x.is_dir(), x.name))
+            # Get all items in directory; scandir entries cache the file type
+            with os.scandir(path) as it:
+                items = [(entry.is_dir(), entry) for entry in it if not entry.name.startswith('.')]
+            items.sort(key=lambda x: (not x[0], x[1].name))
             
-            for i, item in enumerate(items):
-                new_prefix = prefix + ("    " if is_last else "│   ")
-                if item.is_dir():
-                    print_tree(item, new_prefix, i == len(items) - 1)
-                else:
-                    print(new_prefix + ("└── " if i == len(items) - 1 else "├── ") + item.name)
+            # Push children in reverse so they are popped in display order
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            last = len(items) - 1
+            for i in range(last, -1, -1):
+                is_dir, entry = items[i]
+                stack.append((entry.path if is_dir else None, entry.name, new_prefix, i == last))
         
-        print_tree(project_dir)
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def list_projects(self) -> List[Dict]:
         """List all projects with their details"""
@@ -215,9 +300,9 @@ class ProjectManager:
 
     def delete_project(self, name: str):
         """Delete a project"""
-        self.logger.info(f"Deleting project: {name}")
+        self.logger.info("Deleting project: %s", name)
         
-        safe_name = "".join(c if c.isalnum() else "_" for c in name)
+        safe_name = self._safe_name(name)
         project_dir = self.projects_dir / safe_name
         
         if not project_dir.exists():
@@ -238,20 +323,25 @@ class ProjectManager:
             
             # Delete project
             shutil.rmtree(project_dir)
+            # Cached checks may refer to paths that no longer exist
+            self._safe_path_cache.cache_clear()
             print(f"\n🗑️ Deleted project: {project_dir}")
             
             # Update projects data
-            if safe_name in self.projects_data["projects"]:
-                del self.projects_data["projects"][safe_name]
-                if self.projects_data["last_accessed"] == safe_name:
-                    self.projects_data["last_accessed"] = None
-                self._save_projects_data()
+            with self._save_lock:
+                if safe_name in self.projects_data["projects"]:
+                    del self.projects_data["projects"][safe_name]
+                    if self.projects_data["last_accessed"] == safe_name:
+                        self.projects_data["last_accessed"] = None
+                    # The project is already gone from disk; persist that now
+                    self._dirty = True
+                    self.flush()
             
             if self.current_project == project_dir:
                 self.current_project = None
                 
         except Exception as e:
-            self.logger.error(f"Error deleting project: {e}")
+            self.logger.error("Error deleting project: %s", e)
             raise
 
     def add_file_to_project(self, file_path: Path):
@@ -277,15 +367,16 @@ class ProjectManager:
             rel_path = file_path.relative_to(self.current_project)
             project_name = self.current_project.name
             
-            if project_name in self.projects_data["projects"]:
-                if "files" not in self.projects_data["projects"][project_name]:
-                    self.projects_data["projects"][project_name]["files"] = []
-                self.projects_data["projects"][project_name]["files"].append(str(rel_path))
-                self._save_projects_data()
-                print(f"\n📝 Added file to project: {rel_path}")
+            with self._save_lock:
+                if project_name in self.projects_data["projects"]:
+                    if "files" not in self.projects_data["projects"][project_name]:
+                        self.projects_data["projects"][project_name]["files"] = []
+                    self.projects_data["projects"][project_name]["files"].append(str(rel_path))
+                    self._save_projects_data()
+                    print(f"\n📝 Added file to project: {rel_path}")
                 
         except Exception as e:
-            self.logger.error(f"Error adding file to project: {e}")
+            self.logger.error("Error adding file to project: %s", e)
             raise
 
     def get_project_files(self) -> List[Path]:
@@ -297,12 +388,12 @@ class ProjectManager:
             project_name = self.current_project.name
             if project_name in self.projects_data["projects"]:
                 files = [self.current_project / f for f in self.projects_data["projects"][project_name].get("files", [])]
-                # Verify each file
+                # Verify each file; resolving catches symlinks that point outside
                 return [f for f in files if f.exists() and self._is_safe_path(f)]
             return []
             
         except Exception as e:
-            self.logger.error(f"Error getting project files: {e}")
+            self.logger.error("Error getting project files: %s", e)
             return []
 
     def backup_project(self, name: str = None) -> Path:
@@ -329,22 +420,22 @@ class ProjectManager:
                 raise ValueError(error_msg)
             
             # Create backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
             backup_dir = self.backups_dir / f"{project_dir.name}_{timestamp}"
-            shutil.copytree(project_dir, backup_dir)
+            parallel_copytree(project_dir, backup_dir)
             
-            self.logger.info(f"Created backup at: {backup_dir}")
+            self.logger.info("Created backup at: %s", backup_dir)
             print(f"\n💾 Created backup at: {backup_dir}")
             
             return backup_dir
             
         except Exception as e:
-            self.logger.error(f"Error backing up project: {e}")
+            self.logger.error("Error backing up project: %s", e)
             raise
 
     def get_project_path(self, name: str) -> Optional[Path]:
         """Get project path if it exists and is safe"""
-        safe_name = "".join(c if c.isalnum() else "_" for c in name)
+        safe_name = self._safe_name(name)
         project_dir = self.projects_dir / safe_name
         
         if project_dir.exists() and self._is_safe_path(project_dir):
@@ -1,5 +1,7 @@
 from pathlib import Path
 from typing import Dict, Any
+from string import Template
+from types import MappingProxyType
 import json
 
 class ProjectTemplates:
@@ -10,7 +12,7 @@ class ProjectTemplates:
             "files": {
                 "src/__init__.py": "",
                 "src/main.py": """def main():
-    print("Hello from {project_name}!")
+    print("Hello from $project_name!")
 
 if __name__ == "__main__":
     main()
@@ -26,9 +28,9 @@ def test_main():
                 "requirements.txt": """pytest>=7.0.0
 pytest-cov>=4.0.0
 """,
-                "README.md": """# {project_name}
+                "README.md": """# $project_name
 
-{project_description}
+$project_description
 
 ## Setup
 1. Install requirements: `pip install -r requirements.txt`
@@ -56,10 +58,10 @@ if __name__ == '__main__':
                 "src/templates/index.html": """<!DOCTYPE html>
 <html>
 <head>
-    <title>{project_name}</title>
+    <title>$project_name</title>
 </head>
 <body>
-    <h1>Welcome to {project_name}</h1>
+    <h1>Welcome to $project_name</h1>
 </body>
 </html>
 """,
@@ -81,9 +83,9 @@ def test_home_page(client):
 pytest>=7.0.0
 pytest-cov>=4.0.0
 """,
-                "README.md": """# {project_name}
+                "README.md": """# $project_name
 
-{project_description}
+$project_description
 
 ## Setup
 1. Install requirements: `pip install -r requirements.txt`
@@ -100,7 +102,7 @@ pytest-cov>=4.0.0
                 "src/main.py": """from fastapi import FastAPI
 from pydantic import BaseModel
 
-app = FastAPI(title="{project_name}")
+app = FastAPI(title="$project_name")
 
 class Item(BaseModel):
     name: str
@@ -108,7 +110,7 @@ class Item(BaseModel):
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to {project_name}"}
+    return {"message": "Welcome to $project_name"}
 
 @app.get("/items")
 async def get_items():
@@ -131,9 +133,9 @@ pytest>=7.0.0
 httpx>=0.23.0
 pytest-cov>=4.0.0
 """,
-                "README.md": """# {project_name}
+                "README.md": """# $project_name
 
-{project_description}
+$project_description
 
 ## Setup
 1. Install requirements: `pip install -r requirements.txt`
@@ -148,16 +150,32 @@ pytest-cov>=4.0.0
         }
     }
 
+    # Read-only name/description listing, built once since TEMPLATES is fixed
+    _LISTING = MappingProxyType({
+        name: MappingProxyType({
+            "name": template["name"],
+            "description": template["description"]
+        })
+        for name, template in TEMPLATES.items()
+    })
+
+    # string.Template objects for template files, built on first use
+    _compiled: Dict[tuple, Template] = {}
+
+    @classmethod
+    def _get_template(cls, template_name: str, file_path: str) -> Template:
+        """Get the compiled template for a file in a project template"""
+        key = (template_name, file_path)
+        compiled = cls._compiled.get(key)
+        if compiled is None:
+            compiled = Template(cls.TEMPLATES[template_name]["files"][file_path])
+            cls._compiled[key] = compiled
+        return compiled
+
     @classmethod
     def list_templates(cls):
         """List available templates"""
-        return {
-            name: {
-                "name": template["name"],
-                "description": template["description"]
-            }
-            for name, template in cls.TEMPLATES.items()
-        }
+        return cls._LISTING
 
     @classmethod
     def create_from_template(cls, template_name: str, project_path: Path, project_name: str, description: str):
@@ -167,18 +185,21 @@ pytest-cov>=4.0.0
 
         template = cls.TEMPLATES[template_name]
         
-        # Create project directory
-        project_path.mkdir(parents=True, exist_ok=True)
+        # Create the project directory and each distinct subdirectory once,
+        # parents first
+        directories = {(project_path / file_path).parent for file_path in template["files"]}
+        directories.add(project_path)
+        for directory in sorted(directories, key=lambda d: len(d.parts)):
+            directory.mkdir(parents=True, exist_ok=True)
         
         # Create files from template
-        for file_path, content in template["files"].items():
+        for file_path in template["files"]:
             full_path = project_path / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Format content with project details
-            formatted_content = content.format(
+            # Fill in project details; braces in the file bodies are left alone
+            formatted_content = cls._get_template(template_name, file_path).safe_substitute(
                 project_name=project_name,
                 project_description=description
             )
             
-            full_path.write_text(formatted_content)
\ No newline at end of file
+            full_path.write_bytes(formatted_content.encode("utf-8"))
\ No newline at end of file
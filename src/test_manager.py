@@ -1,5 +1,6 @@
-import pytest
 import asyncio
+import os
+import sys
 from pathlib import Path
 import logging
 from typing import Dict, Any, List
@@ -7,11 +8,29 @@ import json
 import coverage
 import ast
 
+logger = logging.getLogger(__name__)
+
+# Generated test stubs for each class and function in a source file
+CLASS_TEST_TEMPLATE = """
+class Test_{name}:
+    def test_{name}_initialization(self):
+        # Test {name} initialization
+        instance = {name}()
+        assert instance is not None
+"""
+
+FUNCTION_TEST_TEMPLATE = """
+def test_{name}():
+    # Test {name} function
+    assert True  # Replace with actual test
+"""
+
 class TestManager:
     def __init__(self, project_manager):
         self.project_manager = project_manager
-        self.logger = logging.getLogger(__name__)
-        self.cov = coverage.Coverage()
+        self.logger = logger
+        # Loaded from the current project's data file after each test run
+        self.cov = None
 
     async def execute_action(self, action_plan: Dict[str, Any]):
         """Execute a test-related action plan"""
@@ -26,10 +45,11 @@ class TestManager:
                 elif step["type"] == "run_tests":
                     await self.run_tests(step["params"])
                 elif step["type"] == "analyze_coverage":
-                    await self.analyze_coverage()
+                    params = step.get("params") or {}
+                    await self.analyze_coverage(html=bool(params.get("html")))
         
         except Exception as e:
-            self.logger.error(f"Error executing test action: {e}")
+            self.logger.error("Error executing test action: %s", e)
             raise
 
     def _generate_test_content(self, source_path: Path) -> str:
@@ -39,40 +59,23 @@ class TestManager:
             source_content = source_path.read_text()
             tree = ast.parse(source_content)
             
-            # Extract classes and functions
-            classes = [node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-            functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+            # Extract top-level classes and functions; only the module body
+            # needs scanning, not every node in the tree
+            classes, functions = [], []
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    classes.append(node)
+                elif isinstance(node, ast.FunctionDef):
+                    functions.append(node)
             
             # Generate test file content
-            content = [
-                "import pytest",
-                f"from {source_path.stem} import *",
-                "",
-                "# Generated Tests"
-            ]
-            
-            # Generate class tests
-            for cls in classes:
-                content.extend([
-                    f"\nclass Test_{cls.name}:",
-                    f"    def test_{cls.name}_initialization(self):",
-                    f"        # Test {cls.name} initialization",
-                    f"        instance = {cls.name}()",
-                    "        assert instance is not None"
-                ])
-            
-            # Generate function tests
-            for func in functions:
-                content.extend([
-                    f"\ndef test_{func.name}():",
-                    f"    # Test {func.name} function",
-                    "    assert True  # Replace with actual test"
-                ])
-            
-            return "\n".join(content)
+            header = f"import pytest\nfrom {source_path.stem} import *\n\n# Generated Tests\n"
+            class_tests = "".join(CLASS_TEST_TEMPLATE.format(name=cls.name) for cls in classes)
+            function_tests = "".join(FUNCTION_TEST_TEMPLATE.format(name=func.name) for func in functions)
+            return header + class_tests + function_tests
             
         except Exception as e:
-            self.logger.error(f"Error generating test content: {e}")
+            self.logger.error("Error generating test content: %s", e)
             raise
 
     async def generate_tests(self, params: Dict[str, Any]):
@@ -95,11 +98,15 @@ class TestManager:
             print(f"\n✅ Generated test file: {test_path}")
 
         except Exception as e:
-            self.logger.error(f"Error generating tests: {e}")
+            self.logger.error("Error generating tests: %s", e)
             raise
 
-    async def run_tests(self, params: Dict[str, Any] = None):
-        """Run pytest for the project"""
+    async def run_tests(self, params: Dict[str, Any] = None, html: bool = False):
+        """Run pytest for the project.
+
+        The HTML coverage report is only written when html is set (or the
+        params request it); otherwise just the text summary is shown.
+        """
         try:
             current_project = self.project_manager.get_current_project()
             if not current_project:
@@ -109,9 +116,6 @@ class TestManager:
             if not test_path.exists():
                 raise ValueError("No tests directory found")
 
-            # Start coverage
-            self.cov.start()
-
             # Run tests
             pytest_args = [
                 str(test_path),
@@ -124,12 +128,30 @@ class TestManager:
                 pytest_args.append("-k")
                 pytest_args.append(params["pattern"])
 
-            print("\n🧪 Running tests...")
-            result = pytest.main(pytest_args)
+            # Run pytest under coverage in a separate process so the assistant
+            # isn't traced; on 3.12+ coverage can use the low-overhead
+            # sys.monitoring tracer
+            env = os.environ.copy()
+            if sys.version_info >= (3, 12):
+                env.setdefault("COVERAGE_CORE", "sysmon")
 
-            # Stop coverage
-            self.cov.stop()
-            self.cov.save()
+            print("\n🧪 Running tests...")
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "coverage", "run", "--parallel-mode",
+                "-m", "pytest", *pytest_args,
+                cwd=str(current_project),
+                env=env
+            )
+            result = await process.wait()
+
+            # Merge the per-process data files into the project's .coverage
+            combine = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "coverage", "combine",
+                cwd=str(current_project),
+                env=env,
+                stdout=asyncio.subprocess.DEVNULL
+            )
+            await combine.wait()
 
             if result == 0:
                 print("\n✅ All tests passed!")
@@ -137,38 +159,41 @@ class TestManager:
                 print("\n❌ Some tests failed")
 
             # Show coverage report
-            await self.analyze_coverage()
+            await self.analyze_coverage(html=html or bool(params and params.get("html")))
 
         except Exception as e:
-            self.logger.error(f"Error running tests: {e}")
+            self.logger.error("Error running tests: %s", e)
             raise
 
-    async def analyze_coverage(self) -> Dict[str, Any]:
-        """Analyze test coverage"""
+    async def analyze_coverage(self, html: bool = False) -> Dict[str, Any]:
+        """Analyze test coverage, writing the HTML report only if html is set"""
         try:
             print("\n📊 Analyzing test coverage...")
+            current_project = self.project_manager.get_current_project()
+            self.cov = coverage.Coverage(data_file=str(current_project / ".coverage"))
             self.cov.load()
             
             # Generate report
             total_coverage = self.cov.report()
             
-            # Generate HTML report
-            current_project = self.project_manager.get_current_project()
-            html_dir = current_project / "htmlcov"
-            self.cov.html_report(directory=str(html_dir))
-            
             report = {
                 "total_coverage": total_coverage,
-                "report_path": str(html_dir / "index.html")
+                "report_path": None
             }
-            
             print(f"\n📈 Total coverage: {total_coverage:.1f}%")
-            print(f"📑 Detailed report: {report['report_path']}")
+            
+            # The HTML report parses and renders every measured file, so it
+            # is only generated on request
+            if html:
+                html_dir = current_project / "htmlcov"
+                self.cov.html_report(directory=str(html_dir))
+                report["report_path"] = str(html_dir / "index.html")
+                print(f"📑 Detailed report: {report['report_path']}")
             
             return report
 
         except Exception as e:
-            self.logger.error(f"Error analyzing coverage: {e}")
+            self.logger.error("Error analyzing coverage: %s", e)
             raise
 
     async def discover_tests(self) -> List[Path]:
@@ -182,7 +207,12 @@ class TestManager:
             if not test_path.exists():
                 return []
 
-            test_files = list(test_path.glob("test_*.py"))
+            # Only matching entries are turned into Path objects
+            with os.scandir(test_path) as it:
+                test_files = [
+                    Path(entry.path) for entry in it
+                    if entry.name.startswith("test_") and entry.name.endswith(".py") and entry.is_file()
+                ]
             print("\n🔍 Found test files:")
             for test_file in test_files:
                 print(f"  - {test_file.relative_to(current_project)}")
@@ -190,5 +220,5 @@ class TestManager:
             return test_files
 
         except Exception as e:
-            self.logger.error(f"Error discovering tests: {e}")
+            self.logger.error("Error discovering tests: %s", e)
             raise
\ No newline at end of file
@@ -1,8 +1,9 @@
-import json
 from pathlib import Path
 import os
 from typing import Dict, Any
 
+from src.utils import json_utils
+
 def load_config() -> Dict[str, Any]:
     """Load configuration from config.json"""
     try:
@@ -18,13 +19,11 @@ def load_config() -> Dict[str, Any]:
                 }
             }
             
-            with open(config_path, "w") as f:
-                json.dump(default_config, f, indent=4)
+            json_utils.write_json(config_path, default_config, indent=True)
             
             return default_config
             
-        with open(config_path) as f:
-            return json.load(f)
+        return json_utils.read_json(config_path)
             
     except Exception as e:
         raise Exception(f"Error loading configuration: {e}")
\ No newline at end of file
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import errno
+import os
+import shutil
+
+# Errors meaning copy_file_range can't be used for this pair of files
+_COPY_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+def fast_copy(src, dst, *, follow_symlinks=True):
+    """Copy a file's contents and permission bits.
+
+    Uses os.copy_file_range where available so the kernel copies the data
+    (or shares it via reflinks on btrfs/xfs), falling back to
+    shutil.copyfile. Timestamps and other metadata are not copied.
+    Usable as a shutil.copytree copy_function.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+            shutil.copymode(src, dst)
+            return dst
+        except OSError as e:
+            if e.errno not in _COPY_RANGE_UNSUPPORTED:
+                raise
+
+    shutil.copyfile(src, dst, follow_symlinks=follow_symlinks)
+    shutil.copymode(src, dst, follow_symlinks=follow_symlinks)
+    return dst
+
+def parallel_copytree(src, dst, copy_function=fast_copy, max_workers: int = None) -> Path:
+    """Copy a directory tree, copying files concurrently on a thread pool.
+
+    Directories are created up front in walk order; dst must not exist.
+    Like shutil.copytree, symlinks are followed. The first error raised by
+    walking the tree or by any file copy is re-raised once all copies have
+    finished.
+    """
+    src, dst = Path(src), Path(dst)
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+
+    dst.mkdir(parents=True)
+    files = []
+    walk_errors = []
+    for root, dirs, names in os.walk(src, onerror=walk_errors.append, followlinks=True):
+        target = dst / os.path.relpath(root, src)
+        for name in dirs:
+            (target / name).mkdir()
+        files.extend((os.path.join(root, name), target / name) for name in names)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(copy_function, file_src, file_dst) for file_src, file_dst in files]
+    if walk_errors:
+        raise walk_errors[0]
+    for future in futures:
+        future.result()
+    return dst
@@ -0,0 +1,89 @@
+from pathlib import Path
+from typing import Any, Callable, List
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data) -> Any:
+    """Parse JSON from str or bytes"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, indent: bool = False, default: Callable = None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, optionally indented by 2 spaces.
+
+    default is called for objects that are not natively serializable.
+    """
+    if orjson:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode()
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file"""
+    return loads(Path(path).read_bytes())
+
+def write_json(path: Path, obj: Any, indent: bool = False, default: Callable = None, atomic: bool = False):
+    """Serialize obj and write it to a JSON file.
+
+    With atomic set, the data is written to a temporary file that then
+    replaces the target, so readers never see a partially written file.
+    """
+    path = Path(path)
+    data = dumps(obj, indent=indent, default=default)
+    if not atomic:
+        path.write_bytes(data)
+        return
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+class ObjectSplitter:
+    """Split streamed JSON text into its top-level objects.
+
+    Text outside of objects (array brackets, commas, markdown fences) is
+    skipped, so each object of a streamed array can be parsed as soon as
+    it is complete.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the objects it completes"""
+        objects = []
+        for ch in text:
+            if not self._depth:
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer.append(ch)
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if not self._depth:
+                    objects.append("".join(self._buffer))
+                    self._buffer = []
+        return objects
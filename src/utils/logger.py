@@ -1,5 +1,8 @@
 import logging
+import logging.handlers
 from pathlib import Path
+import atexit
+import queue
 import sys
 
 def setup_logger():
@@ -12,8 +15,8 @@ def setup_logger():
     logger = logging.getLogger("CodeMe")
     logger.setLevel(logging.INFO)
     
-    # File handler
-    file_handler = logging.FileHandler(log_dir / "codeme.log")
+    # File handler (the file is opened on the first record)
+    file_handler = logging.FileHandler(log_dir / "codeme.log", delay=True)
     file_handler.setLevel(logging.INFO)
     
     # Console handler
@@ -25,8 +28,16 @@ def setup_logger():
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
+    # Records are queued and written by a background thread, so logging
+    # calls never wait on file or console I/O
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    
     # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
-    return logger
\ No newline at end of file
+    return logger
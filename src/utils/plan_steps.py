@@ -0,0 +1,30 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, List
+
+def group_steps(steps: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group consecutive action plan steps that share a "parallel_group".
+
+    Steps in the same group are independent and may run concurrently;
+    groups run in order. Steps without a parallel_group form a group of
+    their own, so plans that don't use it run strictly sequentially.
+    """
+    groups = []
+    current_group = None
+    for step in steps:
+        group = step.get("parallel_group")
+        if group is not None and groups and group == current_group:
+            groups[-1].append(step)
+        else:
+            groups.append([step])
+        current_group = group
+    return groups
+
+async def run_plan(steps: List[Dict[str, Any]],
+                   execute_step: Callable[[Dict[str, Any]], Awaitable[Any]]):
+    """Run action plan steps with execute_step, group by group.
+
+    Independent steps sharing a parallel_group run concurrently; the first
+    error from a group is raised before any later group starts.
+    """
+    for group in group_steps(steps):
+        await asyncio.gather(*[execute_step(step) for step in group])
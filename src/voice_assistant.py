@@ -1,14 +1,20 @@
 import speech_recognition as sr
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
+import httpx
 import json
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List, AsyncIterator
+from collections import OrderedDict
 import asyncio
+import itertools
+import re
+import time
 import queue
 import threading
 from concurrent.futures import ThreadPoolExecutor
 import sys
+import os
 import aioconsole
 from datetime import datetime
 
@@ -16,20 +22,159 @@ from src.project_manager import ProjectManager
 from src.code_manager import CodeManager
 from src.test_manager import TestManager
 from src.deployment_manager import DeploymentManager
+from src.utils import json_utils
+from src.utils.json_utils import ObjectSplitter
+
+SYSTEM_PROMPT = "You are an AI coding assistant that helps write, test, and deploy code. Convert voice commands into specific coding actions. IMPORTANT: Respond with a single JSON object representing the action plan."
+
+# Instructions and JSON format shared by every command, sent once as part
+# of the system prompt instead of in every user message
+PLAN_INSTRUCTIONS = """
+You are a voice-controlled coding assistant. Parse the command and respond with a SINGLE JSON object containing the action plan.
+DO NOT include any explanatory text - ONLY output valid JSON.
+
+When handling file operations:
+1. Use the current_file path if the command refers to "this file", "that file", or similar
+2. For editing commands, include both the file path and the content to write
+3. For modifications, include the entire new content of the file
+4. For showing file contents, use the "analyze_code" type
+5. Place new files in the appropriate project subdirectory (src/tests/docs)
+6. Steps that do not depend on each other may share the same integer "parallel_group" to run concurrently
+
+When handling test commands (action_type "test"):
+1. Use "generate_tests" with a "source_file" param to write tests for a source file
+2. Use "run_tests" to run the tests; an optional "pattern" param selects tests by name
+3. Use "analyze_coverage" to show test coverage
+4. Set the "html" param to true on "run_tests" or "analyze_coverage" only when an HTML coverage report is asked for
+
+Required JSON format:
+{
+    "action_type": "code|test|deploy|navigate",
+    "description": "Detailed description of what will be done",
+    "steps": [
+        {
+            "type": "create_file|modify_file|analyze_code|generate_tests|run_tests|analyze_coverage",
+            "parallel_group": null,
+            "params": {
+                "file_name": "path/to/file",
+                "content": "complete content to write to file",
+                "mode": "write|append|prepend"
+            }
+        }
+    ],
+    "code": "complete file content",
+    "file_path": "full/path/to/file"
+}
+"""
+
+# Per-command part of the prompt, filled in with format_map
+CONTEXT_TEMPLATE = """Current Context:
+- Project Root: {project_root}
+- Current Project: {project_name}
+- Current File: {current_file}
+- Last Action: {last_action}
+- Current Task: {current_task}
+
+If the command refers to the current file, use this path: {current_file}
+"""
+
+PROMPT_TEMPLATE = """
+Command: {command}
+""" + CONTEXT_TEMPLATE
+
+BATCH_PROMPT_TEMPLATE = """
+Commands (in the order given; later commands may refer to earlier ones):
+{commands}
+""" + CONTEXT_TEMPLATE + """
+Respond with a JSON array holding one action plan object per command, in the same order, instead of a single object.
+"""
+
+# Markdown code fence Claude sometimes wraps the JSON in
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*\Z", re.DOTALL)
+
+# Maximum number of action plans kept for replaying repeated commands
+RESPONSE_CACHE_SIZE = 128
+# Step types that don't carry generated content, so their plans can be
+# replayed for a repeated command without asking Claude again
+REPLAYABLE_STEPS = frozenset({"analyze_code", "run_tests", "analyze_coverage", "status"})
+
+# Longest phrase recorded for a single voice command, in seconds
+PHRASE_TIME_LIMIT = 10
+
+# Phrases recognized at the same time, and the most that may be waiting
+# for recognition before new ones are dropped
+ASR_WORKERS = 3
+ASR_BACKLOG = 4
+
+# Number of commands kept in the history file
+HISTORY_LIMIT = 1000
+
+# Commands sent to Claude must have at least MIN_COMMAND_WORDS words and
+# mention one of ACTION_KEYWORDS; anything else is rejected locally
+MIN_COMMAND_WORDS = 2
+ACTION_KEYWORDS = (
+    "create", "edit", "show", "run", "add", "fix", "refactor", "test", "deploy",
+    "write", "implement", "modify", "update", "change", "delete", "remove",
+    "rename", "analyze", "build", "rollback", "status", "generate", "coverage",
+    "open", "explain", "file", "function", "class"
+)
+
+# Commands starting with one of these verbs only read or run things, so
+# they need just a short plan from the smaller model; anything else may
+# carry whole file contents and goes to the larger model
+PLAN_ONLY_VERBS = frozenset({"show", "run", "status", "analyze", "deploy", "rollback", "coverage"})
+CODEGEN_MODEL = "claude-3-5-sonnet-20241022"
+CODEGEN_MAX_TOKENS = 4096
+PLAN_MODEL = "claude-3-5-haiku-20241022"
+PLAN_MAX_TOKENS = 512
+
+# Maximum number of commands waiting to be processed
+COMMAND_QUEUE_SIZE = 64
+
+# Maximum number of queued commands sent to Claude in one request
+COMMAND_BATCH_SIZE = 8
+
+# System prompt blocks. They are too short to reach the minimum prompt
+# caching length, so no cache breakpoint is set.
+SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT},
+    {"type": "text", "text": PLAN_INSTRUCTIONS},
+]
 
 class VoiceCodingAssistant:
     def __init__(self, anthropic_api_key: str, project_root: str, wake_word: str):
-        self.client = Anthropic(api_key=anthropic_api_key)
+        # One persistent HTTP/2 connection pool for all Claude calls
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=4, max_connections=8)
+        )
+        self.client = AsyncAnthropic(api_key=anthropic_api_key, http_client=self._http)
         self.recognizer = sr.Recognizer()
         self.wake_word = wake_word.lower()
         self.is_running = False
         self.logger = logging.getLogger(__name__)
-        self.command_queue = asyncio.Queue()
+        self.command_queue = asyncio.Queue(maxsize=COMMAND_QUEUE_SIZE)
         self.loop = None
+        # Stops the background listener started in start()
+        self._stop_listening = None
+        # Speech recognition runs on its own pool so capture never waits on
+        # Google; results are queued in capture order
+        self._asr_pool = None
+        self._asr_results = asyncio.Queue()
+        self._asr_slots = threading.BoundedSemaphore(ASR_BACKLOG)
+        self.dropped_phrases = 0
         self.history = []
+        # Append-only JSONL log of commands, opened in start()
+        self.history_file = Path(project_root) / 'logs' / 'command_history.jsonl'
+        self._history_fh = None
+        # Action plans keyed by (project, current file, normalized command)
+        self.response_cache: OrderedDict = OrderedDict()
         
         # Initialize project manager first
         self.project_manager = ProjectManager(project_root)
+        # Current project directory, refreshed after each project command
+        self._current_project = self.project_manager.get_current_project()
         
         # Initialize managers with project manager
         self.code_manager = CodeManager(self.project_manager)
@@ -53,14 +198,20 @@ class VoiceCodingAssistant:
         print("\n🚀 Starting CodeMe AI Voice Assistant...")
         self.logger.info("Starting voice recognition...")
         
-        # Start voice recognition in a separate thread
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self.voice_future = self.loop.run_in_executor(
-            self.executor, 
-            self._voice_recognition_loop
-        )
+        # Each command is appended to the history file as it is received
+        self.history_file.parent.mkdir(exist_ok=True)
+        self._history_fh = open(self.history_file, 'ab', buffering=8192)
         
-        # Start text input loop
+        # Start listening in the background; speech_recognition captures
+        # phrases on its own thread and calls _on_audio for each one
+        try:
+            await asyncio.to_thread(self._start_voice_recognition)
+        except Exception as e:
+            self.logger.error(f"Error starting voice recognition: {e}")
+            print(f"\n❌ Voice input unavailable: {e}")
+        
+        # Start voice command and text input loops
+        asyncio.create_task(self._voice_command_loop())
         asyncio.create_task(self._text_input_loop())
         
         # Start command processing loop
@@ -76,37 +227,78 @@ class VoiceCodingAssistant:
         self.is_running = False
         print("\n👋 Shutting down assistant...")
         self.logger.info("Stopping voice assistant...")
-        if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=False)
+        if self._stop_listening is not None:
+            self._stop_listening(wait_for_stop=False)
+            self._stop_listening = None
+        if self._asr_pool is not None:
+            self._asr_pool.shutdown(wait=False, cancel_futures=True)
+            self._asr_pool = None
         
-        # Save command history
+        # Save command history and any pending project metadata
         self._save_history()
+        self.project_manager.flush()
+        
+        # Release the Claude client's pooled connections
+        await self.client.close()
+        await self._http.aclose()
 
-    def _voice_recognition_loop(self):
-        """Handle continuous voice recognition"""
-        with sr.Microphone() as source:
+    def _start_voice_recognition(self):
+        """Calibrate the microphone and start listening in the background"""
+        microphone = sr.Microphone()
+        with microphone as source:
             self.recognizer.adjust_for_ambient_noise(source)
-            self._print_help()
-            self.logger.info("Microphone ready, listening for commands...")
+        self._asr_pool = ThreadPoolExecutor(max_workers=ASR_WORKERS, thread_name_prefix="asr")
+        self._print_help()
+        self._stop_listening = self.recognizer.listen_in_background(
+            microphone, self._on_audio, phrase_time_limit=PHRASE_TIME_LIMIT
+        )
+        self.logger.info("Microphone ready, listening for commands...")
+
+    def _on_audio(self, recognizer: sr.Recognizer, audio: sr.AudioData):
+        """Hand a captured phrase to the recognition pool"""
+        if not self.is_running or self._asr_pool is None:
+            return
+        if not self._asr_slots.acquire(blocking=False):
+            self.dropped_phrases += 1
+            self.logger.warning(f"Speech recognition backlog full, dropped phrase ({self.dropped_phrases} so far)")
+            return
+        future = self._asr_pool.submit(self._recognize, recognizer, audio)
+        self.loop.call_soon_threadsafe(self._asr_results.put_nowait, future)
+
+    def _recognize(self, recognizer: sr.Recognizer, audio: sr.AudioData) -> Optional[str]:
+        """Convert a phrase to text with Google speech recognition"""
+        try:
+            return recognizer.recognize_google(audio).lower()
+        except sr.UnknownValueError:
+            return None
+        except Exception as e:
+            self.logger.error(f"Error in voice recognition: {e}")
+            print(f"\n❌ Error understanding audio: {e}")
+            return None
+
+    async def _voice_command_loop(self):
+        """Queue recognized phrases that contain the wake word, in capture order"""
+        while self.is_running:
+            future = await self._asr_results.get()
+            try:
+                text = await asyncio.wrap_future(future)
+            finally:
+                self._asr_slots.release()
             
-            while self.is_running:
-                try:
-                    audio = self.recognizer.listen(source)
-                    text = self.recognizer.recognize_google(audio).lower()
-                    
-                    if self.wake_word in text:
-                        command = text.replace(self.wake_word, "").strip()
-                        asyncio.run_coroutine_threadsafe(
-                            self.command_queue.put(("voice", command)),
-                            self.loop
-                        )
-                        print(f"\n🎯 Voice command received: '{command}'")
-                        
-                except sr.UnknownValueError:
-                    pass
-                except Exception as e:
-                    self.logger.error(f"Error in voice recognition: {e}")
-                    print(f"\n❌ Error understanding audio: {e}")
+            if text and self.wake_word in text:
+                command = text.replace(self.wake_word, "").strip()
+                if self._enqueue_command("voice", command):
+                    print(f"\n🎯 Voice command received: '{command}'")
+
+    def _enqueue_command(self, command_type: str, command: str) -> bool:
+        """Queue a command for processing, dropping it if the queue is full"""
+        try:
+            self.command_queue.put_nowait((command_type, command))
+            return True
+        except asyncio.QueueFull:
+            self.logger.warning(f"Command queue full, dropped {command_type} command: {command}")
+            print(f"\n⚠️ Still busy with earlier commands, dropped: '{command}'")
+            return False
 
     async def _text_input_loop(self):
         """Handle text input commands"""
@@ -123,23 +315,12 @@ class VoiceCodingAssistant:
                     self.is_running = False
                     break
                     
-                if command == 'help':
-                    self._print_help()
-                    continue
-                    
-                if command == 'history':
-                    self._show_history()
-                    continue
-                    
-                if command == 'context':
-                    self._show_context()
-                    continue
-                    
-                if command == 'projects':
-                    self._show_projects()
+                handler = self._TEXT_DISPATCH.get(command)
+                if handler:
+                    handler(self)
                     continue
                 
-                await self.command_queue.put(("text", command))
+                self._enqueue_command("text", command)
                 
             except Exception as e:
                 self.logger.error(f"Error in text input: {e}")
@@ -167,6 +348,7 @@ class VoiceCodingAssistant:
         print("   - edit file [name]")
         print("   - show file [name]")
         print("   - run tests for current project")
+        print("   - show html coverage report")
         print("\n📚 Example Commands:")
         print("   - create project MyWebApp 'A web application project'")
         print("   - load project MyWebApp")
@@ -179,13 +361,14 @@ class VoiceCodingAssistant:
         """Show command history"""
         print("\n📜 Command History:")
         for entry in self.history[-10:]:  # Show last 10 commands
-            print(f"  {entry['timestamp']} - [{entry['type']}] {entry['command']}")
+            timestamp = datetime.fromtimestamp(entry['timestamp']).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"  {timestamp} - [{entry['type']}] {entry['command']}")
 
     def _show_context(self):
         """Show current context"""
         print("\n🔍 Current Context:")
         print(f"  Project Root: {self.context['project_root']}")
-        project_name = self.project_manager.get_current_project().name if self.project_manager.get_current_project() else "None"
+        project_name = self._current_project.name if self._current_project else "None"
         print(f"  Current Project: {project_name}")
         print(f"  Current File: {self.context['current_file']}")
         print(f"  Last Action: {self.context['last_action']}")
@@ -204,25 +387,38 @@ class VoiceCodingAssistant:
             print(f"     Created: {project['created_at']}")
             print(f"     Last Accessed: {project['last_accessed']}")
 
+    # Text-only commands handled without going through the command queue
+    _TEXT_DISPATCH = {
+        "help": _print_help,
+        "history": _show_history,
+        "context": _show_context,
+        "projects": _show_projects,
+    }
+
+    def _record_history(self, entry: Dict[str, Any]):
+        """Add a command to the history and append it to the history file"""
+        self.history.append(entry)
+        if self._history_fh is not None:
+            self._history_fh.write(json_utils.dumps(entry) + b"\n")
+
     def _save_history(self):
-        """Save command history to file"""
+        """Flush the command history file and trim it to HISTORY_LIMIT entries"""
         try:
-            history_file = Path(self.context['project_root']) / 'logs' / 'command_history.json'
-            history_file.parent.mkdir(exist_ok=True)
+            if self._history_fh is not None:
+                self._history_fh.close()
+                self._history_fh = None
             
-            existing_history = []
-            if history_file.exists():
-                with open(history_file) as f:
-                    existing_history = json.load(f)
-                    
-            # Combine existing history with new commands
-            all_history = existing_history + self.history
-            
-            # Keep last 1000 commands
-            all_history = all_history[-1000:]
+            if not self.history_file.exists():
+                return
             
-            with open(history_file, 'w') as f:
-                json.dump(all_history, f, indent=2)
+            # Compact once at shutdown instead of rewriting on every command
+            with open(self.history_file, 'rb') as f:
+                lines = f.readlines()
+            if len(lines) > HISTORY_LIMIT:
+                tmp_file = self.history_file.with_suffix('.jsonl.tmp')
+                with open(tmp_file, 'wb') as f:
+                    f.writelines(lines[-HISTORY_LIMIT:])
+                os.replace(tmp_file, self.history_file)
                 
         except Exception as e:
             self.logger.error(f"Error saving history: {e}")
@@ -231,20 +427,34 @@ class VoiceCodingAssistant:
         """Process commands from the queue"""
         while self.is_running:
             try:
-                command_type, command = await self.command_queue.get()
+                batch = [await self.command_queue.get()]
+                # Commands that queued up while the previous ones were being
+                # processed are sent to Claude together
+                while len(batch) < COMMAND_BATCH_SIZE and not self.command_queue.empty():
+                    item = self.command_queue.get_nowait()
+                    # A command repeated back to back (e.g. heard twice) runs once
+                    if item[1] != batch[-1][1]:
+                        batch.append(item)
                 
-                # Handle project management commands directly
-                if self._handle_project_command(command):
-                    continue
-                
-                # Add to history
-                self.history.append({
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'type': command_type,
-                    'command': command
-                })
+                pending = []
+                for command_type, command in batch:
+                    # Handle project management commands directly, after the
+                    # commands queued before them
+                    if self._is_project_command(command):
+                        await self._process_commands(pending)
+                        pending = []
+                        if self._handle_project_command(command):
+                            continue
+                    
+                    # Add to history
+                    self._record_history({
+                        'timestamp': time.time(),
+                        'type': command_type,
+                        'command': command
+                    })
+                    pending.append(command)
                 
-                await self._process_command(command)
+                await self._process_commands(pending)
                     
             except asyncio.CancelledError:
                 break
@@ -253,37 +463,22 @@ class VoiceCodingAssistant:
                 print(f"\n❌ Error processing command: {e}")
                 await asyncio.sleep(0.1)
 
+    def _is_project_command(self, command: str) -> bool:
+        """Check whether a command may be a project management command"""
+        return tuple(command.split(None, 2)[:2]) in self._PROJECT_DISPATCH
+
     def _handle_project_command(self, command: str) -> bool:
         """Handle project management commands"""
         try:
-            cmd_parts = command.split()
-            if len(cmd_parts) >= 2:
-                if cmd_parts[0] == "create" and cmd_parts[1] == "project":
-                    name = cmd_parts[2]
-                    description = " ".join(cmd_parts[3:]) if len(cmd_parts) > 3 else ""
-                    self.project_manager.create_project(name, description)
-                    print(f"\n✅ Created project: {name}")
-                    return True
-                
-                elif cmd_parts[0] == "load" and cmd_parts[1] == "project":
-                    name = cmd_parts[2]
-                    self.project_manager.load_project(name)
-                    print(f"\n✅ Loaded project: {name}")
-                    return True
-                
-                elif cmd_parts[0] == "delete" and cmd_parts[1] == "project":
-                    name = cmd_parts[2]
-                    self.project_manager.delete_project(name)
-                    print(f"\n✅ Deleted project: {name}")
-                    return True
-                
-                elif cmd_parts[0] == "backup" and cmd_parts[1] == "project":
-                    backup_path = self.project_manager.backup_project()
-                    print(f"\n✅ Created backup at: {backup_path}")
-                    return True
-                
-            elif command == "list projects":
-                self._show_projects()
+            # Split off at most the name, keeping the rest (a description) intact
+            cmd_parts = command.split(None, 3)
+            handler = self._PROJECT_DISPATCH.get(tuple(cmd_parts[:2]))
+            if handler:
+                try:
+                    handler(self, cmd_parts)
+                finally:
+                    # Only project commands change the current project
+                    self._current_project = self.project_manager.get_current_project()
                 return True
                 
         except Exception as e:
@@ -292,91 +487,266 @@ class VoiceCodingAssistant:
             
         return False
 
+    def _cmd_create_project(self, cmd_parts: List[str]):
+        name = cmd_parts[2]
+        description = cmd_parts[3] if len(cmd_parts) > 3 else ""
+        # Allow the description to be quoted, as in the help examples
+        if len(description) >= 2 and description[0] == description[-1] and description[0] in "'\"":
+            description = description[1:-1]
+        self.project_manager.create_project(name, description)
+        print(f"\n✅ Created project: {name}")
+
+    def _cmd_load_project(self, cmd_parts: List[str]):
+        name = cmd_parts[2]
+        self.project_manager.load_project(name)
+        print(f"\n✅ Loaded project: {name}")
+
+    def _cmd_delete_project(self, cmd_parts: List[str]):
+        name = cmd_parts[2]
+        self.project_manager.delete_project(name)
+        print(f"\n✅ Deleted project: {name}")
+
+    def _cmd_backup_project(self, cmd_parts: List[str]):
+        backup_path = self.project_manager.backup_project()
+        print(f"\n✅ Created backup at: {backup_path}")
+
+    def _cmd_list_projects(self, cmd_parts: List[str]):
+        self._show_projects()
+
+    # Project commands, keyed by their first two words
+    _PROJECT_DISPATCH = {
+        ("create", "project"): _cmd_create_project,
+        ("load", "project"): _cmd_load_project,
+        ("delete", "project"): _cmd_delete_project,
+        ("backup", "project"): _cmd_backup_project,
+        ("list", "projects"): _cmd_list_projects,
+    }
+
     async def _process_command(self, command: str):
         """Process voice command using Claude"""
+        # Check if we have a current project
+        current_project = self._current_project
+        if not current_project and not command.startswith(("create project", "load project", "list project")):
+            print("\n⚠️ No project loaded. Please create or load a project first.")
+            return
+        
+        # Don't spend a round trip on commands Claude can't act on
+        if not self._is_actionable(command):
+            self._reject_command(command)
+            return
+        
         try:
             print("\n🤖 Processing command...")
             self.logger.info(f"Processing command: {command}")
             
-            # Check if we have a current project
-            if not self.project_manager.get_current_project() and not command.startswith(("create project", "load project", "list project")):
-                print("\n⚠️ No project loaded. Please create or load a project first.")
+            # Replay the plan of an identical earlier command in the same context
+            cache_key = self._cache_key(command, current_project)
+            cached_plan = self.response_cache.get(cache_key)
+            if cached_plan is not None:
+                self.response_cache.move_to_end(cache_key)
+                print("🔄 Repeating your previous request...")
+                await self._execute_action_plan(cached_plan)
                 return
             
             # Prepare context for Claude
             prompt = self._create_prompt(command)
             
             print("⏳ Thinking about how to help...")
-            # Get response from Claude using thread pool
-            response = await self.loop.run_in_executor(
-                self.executor,
-                lambda: self.client.messages.create(
-                    model="claude-3-sonnet-20240229",
-                    max_tokens=4096,
-                    temperature=0,
-                    system="You are an AI coding assistant that helps write, test, and deploy code. Convert voice commands into specific coding actions. IMPORTANT: Respond with a single JSON object representing the action plan.",
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-            )
+            codegen = self._is_codegen(command)
+            response = "".join([chunk async for chunk in self._stream_claude(prompt, codegen)])
             
             print("🔄 Executing your request...")
             # Parse and execute the action plan
-            await self._execute_action_plan(response.content)
+            plan = await self._execute_action_plan(response)
+            if plan is not None and self._is_replayable(plan):
+                self._cache_plan(cache_key, plan)
             
         except Exception as e:
             self.logger.error(f"Error processing command: {e}")
             print(f"\n❌ Error: {e}")
 
-    def _create_prompt(self, command: str) -> str:
-        """Create a detailed prompt for Claude"""
-        current_project = self.project_manager.get_current_project()
-        project_name = current_project.name if current_project else "None"
+    async def _process_commands(self, commands: List[str]):
+        """Process several queued commands, batching the plan-only ones"""
+        if self._current_project:
+            for command in commands:
+                if not self._is_actionable(command):
+                    self._reject_command(command)
+            commands = [command for command in commands if self._is_actionable(command)]
         
-        return f"""
-You are a voice-controlled coding assistant. Parse the command and respond with a SINGLE JSON object containing the action plan.
-DO NOT include any explanatory text - ONLY output valid JSON.
+        if len(commands) <= 1 or not self._current_project:
+            for command in commands:
+                await self._process_command(command)
+            return
+        
+        # Code generation plans carry whole files and would not fit several
+        # to a response, so only runs of plan-only commands are batched
+        for codegen, run in itertools.groupby(commands, key=self._is_codegen):
+            run = list(run)
+            if codegen or len(run) == 1:
+                for command in run:
+                    await self._process_command(command)
+            else:
+                await self._process_plan_batch(run)
 
-Command: {command}
-Current Context:
-- Project Root: {self.context['project_root']}
-- Current Project: {project_name}
-- Current File: {self.context['current_file']}
-- Last Action: {self.context['last_action']}
-- Current Task: {self.context['current_task']}
+    async def _process_plan_batch(self, commands: List[str]):
+        """Ask Claude about several plan-only commands in one call.
 
-When handling file operations:
-1. Use the current_file path if the command refers to "this file", "that file", or similar
-2. For editing commands, include both the file path and the content to write
-3. For modifications, include the entire new content of the file
-4. For showing file contents, use the "analyze_code" type
-5. Place new files in the appropriate project subdirectory (src/tests/docs)
+        Plans are streamed back as a JSON array and each one runs as soon as
+        it and the plans before it are complete.
+        """
+        print(f"\n🤖 Processing {len(commands)} commands...")
+        self.logger.info(f"Processing commands: {commands}")
+        
+        # Commands with a cached plan don't need to go to Claude
+        current_project = self._current_project
+        cache_keys = [self._cache_key(command, current_project) for command in commands]
+        plans = [self.response_cache.get(key) for key in cache_keys]
+        missing = [i for i, plan in enumerate(plans) if plan is None]
+        done = 0
+        
+        try:
+            if missing:
+                print("⏳ Thinking about how to help...")
+                pending = iter(missing)
+                splitter = ObjectSplitter()
+                batch = [commands[i] for i in missing]
+                prompt = self._create_batch_prompt(batch)
+                async for chunk in self._stream_claude(prompt, codegen=False, plans=len(batch)):
+                    for plan_json in splitter.feed(chunk):
+                        index = next(pending, None)
+                        if index is None:
+                            raise ValueError("more action plans than commands")
+                        plans[index] = json_utils.loads(plan_json)
+                        done = await self._run_ready_plans(plans, done, cache_keys, missing)
+            done = await self._run_ready_plans(plans, done, cache_keys, missing)
+            
+        except Exception as e:
+            self.logger.error(f"Error processing command batch: {e}")
+        
+        # Ask about commands whose plans never arrived on their own
+        for command in commands[done:]:
+            await self._process_command(command)
 
-Required JSON format:
-{{
-    "action_type": "code|test|deploy|navigate",
-    "description": "Detailed description of what will be done",
-    "steps": [
-        {{
-            "type": "create_file|modify_file|analyze_code",
-            "params": {{
-                "file_name": "path/to/file",
-                "content": "complete content to write to file",
-                "mode": "write|append|prepend"
-            }}
-        }}
-    ],
-    "code": "complete file content",
-    "file_path": "full/path/to/file"
-}}
+    async def _run_ready_plans(self, plans: List[Optional[Dict[str, Any]]], start: int,
+                               cache_keys: List[tuple], fresh: List[int]) -> int:
+        """Run plans in order from start up to the first one not received yet.
 
-If the command refers to the current file, use this path: {self.context['current_file']}
-"""
+        Returns the index of the next plan to run.
+        """
+        index = start
+        while index < len(plans) and plans[index] is not None:
+            plan = plans[index]
+            try:
+                await self._run_action_plan(plan)
+                if index in fresh and self._is_replayable(plan):
+                    self._cache_plan(cache_keys[index], plan)
+            except Exception as e:
+                self.logger.error(f"Error processing command: {e}")
+                print(f"\n❌ Error: {e}")
+            index += 1
+        return index
+
+    def _is_actionable(self, command: str) -> bool:
+        """Cheaply check that a command looks like something Claude can act on"""
+        return len(command.split()) >= MIN_COMMAND_WORDS and any(
+            keyword in command for keyword in ACTION_KEYWORDS
+        )
+
+    def _reject_command(self, command: str):
+        """Tell the user a command wasn't understood"""
+        self.logger.info(f"Ignoring command: {command}")
+        print(f"\n❓ Not sure what to do with '{command}'. Type 'help' for example commands.")
+
+    def _is_codegen(self, command: str) -> bool:
+        """Check whether Claude's plan for a command may include file content"""
+        words = command.split(None, 1)
+        return not words or words[0] not in PLAN_ONLY_VERBS
+
+    async def _stream_claude(self, prompt: str, codegen: bool = True, plans: int = 1) -> AsyncIterator[str]:
+        """Send a prompt to Claude with the shared system instructions,
+        yielding the response text as it is generated.
+
+        Prompts that may need code written use CODEGEN_MODEL; the rest use
+        the faster PLAN_MODEL with room for the given number of plans.
+        """
+        if codegen:
+            model, max_tokens = CODEGEN_MODEL, CODEGEN_MAX_TOKENS
+        else:
+            model, max_tokens = PLAN_MODEL, min(PLAN_MAX_TOKENS * plans, CODEGEN_MAX_TOKENS)
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=0,
+            system=SYSTEM_BLOCKS,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    def _cache_key(self, command: str, current_project: Optional[Path]) -> tuple:
+        """Key a command's plan by the context it was planned in"""
+        return (
+            current_project.name if current_project else None,
+            self.context['current_file'],
+            " ".join(command.split())
+        )
+
+    def _cache_plan(self, cache_key: tuple, plan: Dict[str, Any]):
+        """Remember a replayable plan, evicting the least recently used"""
+        self.response_cache[cache_key] = plan
+        if len(self.response_cache) > RESPONSE_CACHE_SIZE:
+            self.response_cache.popitem(last=False)
+
+    def _create_prompt(self, command: str) -> str:
+        """Create the per-command part of the prompt for Claude.
+
+        The fixed instructions are sent separately as cached system blocks.
+        """
+        return PROMPT_TEMPLATE.format_map(self._prompt_fields(command=command))
+
+    def _create_batch_prompt(self, commands: List[str]) -> str:
+        """Create the prompt asking for one action plan per command"""
+        numbered = "\n".join(f"{i}. {command}" for i, command in enumerate(commands, 1))
+        return BATCH_PROMPT_TEMPLATE.format_map(self._prompt_fields(commands=numbered))
+
+    def _prompt_fields(self, **fields) -> Dict[str, Any]:
+        """Collect the current context fields for the prompt templates"""
+        current_project = self._current_project
+        fields.update(
+            project_root=self.context['project_root'],
+            project_name=current_project.name if current_project else "None",
+            current_file=self.context['current_file'],
+            last_action=self.context['last_action'],
+            current_task=self.context['current_task']
+        )
+        return fields
+
+    def _is_replayable(self, plan: Dict[str, Any]) -> bool:
+        """Check whether a plan only reads or runs things and can be reused"""
+        steps = plan.get("steps")
+        return bool(steps) and not plan.get("code") and all(
+            step.get("type") in REPLAYABLE_STEPS for step in steps
+        )
+
+    async def _execute_action_plan(self, response) -> Optional[Dict[str, Any]]:
+        """Execute the action plan from Claude.
+
+        Accepts Claude's response content or an already parsed plan, and
+        returns the plan once executed (None if it could not be parsed).
+        """
+        if isinstance(response, dict):
+            return await self._run_action_plan(response)
+        
+        plan = self._parse_action_plan(response)
+        if plan is None:
+            return None
+        return await self._run_action_plan(plan)
 
-    async def _execute_action_plan(self, response):
-        """Execute the action plan from Claude"""
+    def _parse_action_plan(self, response) -> Optional[Any]:
+        """Extract and parse the JSON in Claude's response (None if invalid)"""
         try:
             # Handle TextBlock response from Claude
             if hasattr(response, 'content'):
@@ -388,24 +758,29 @@ If the command refers to the current file, use this path: {self.context['current
                 json_str = response if isinstance(response, str) else str(response)
             
             # Clean the response to ensure it's valid JSON
-            json_str = json_str.strip()
-            if json_str.startswith('```json'):
-                json_str = json_str[7:]
-            if json_str.endswith('```'):
-                json_str = json_str[:-3]
-            json_str = json_str.strip()
+            match = _FENCE_RE.match(json_str)
+            json_str = match.group(1) if match else json_str.strip()
             
             # Log the cleaned JSON for debugging
             self.logger.debug(f"Cleaned JSON string: {json_str}")
             
             # Parse the JSON
             try:
-                plan = json.loads(json_str)
+                return json_utils.loads(json_str)
             except json.JSONDecodeError as e:
                 self.logger.error(f"Invalid JSON response from Claude: {json_str}")
                 print(f"\n❌ Error understanding Claude's response: {e}")
-                return
-            
+                return None
+        
+        except Exception as e:
+            self.logger.error(f"Error executing action plan: {e}")
+            self.logger.error(f"Response was: {response}")
+            print(f"\n❌ Error executing action: {e}")
+            raise
+
+    async def _run_action_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch a parsed action plan to the matching manager"""
+        try:
             print(f"\n📝 Plan: {plan['description']}")
             self.logger.info(f"Executing plan: {plan['description']}")
             
@@ -433,14 +808,15 @@ If the command refers to the current file, use this path: {self.context['current
                 print(f"\n📂 Current file: {self.context['current_file']}")
             
             # Update current project in context
-            current_project = self.project_manager.get_current_project()
+            current_project = self._current_project
             if current_project:
                 self.context["current_project"] = current_project.name
             
             print("\n🎤 Ready for next command...")
+            return plan
                 
         except Exception as e:
             self.logger.error(f"Error executing action plan: {e}")
-            self.logger.error(f"Response was: {response}")
+            self.logger.error(f"Plan was: {plan}")
             print(f"\n❌ Error executing action: {e}")
             raise
\ No newline at end of file
@@ -3,14 +3,15 @@ from pathlib import Path
 import sys
 import site
 import importlib.util
+from importlib.metadata import distribution, PackageNotFoundError
 import subprocess
 
 def find_package(package_name: str) -> bool:
-    """Check if a package is installed in any Python path"""
+    """Check if a distribution is installed, without importing it"""
     try:
-        __import__(package_name.replace("-", "_"))
+        distribution(package_name)
         return True
-    except ImportError:
+    except PackageNotFoundError:
         return False
 
 def check_environment():
@@ -68,11 +69,11 @@ def check_environment():
         print("\n❌ Some required files are missing!")
         return False
 
-    # Check dependencies
+    # Check dependencies (by distribution name, as passed to pip)
     print("\nChecking dependencies...")
     required_packages = [
         "anthropic",
-        "speech_recognition",
+        "SpeechRecognition",
         "sounddevice",
         "numpy",
         "pytest",
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-import requests
+import httpx
 import json
 
 def test_api_detailed():
@@ -31,11 +31,13 @@ def test_api_detailed():
     }
     
     try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=data
-        )
+        # A persistent HTTP/2 client, as the assistant uses, so repeated
+        # calls measure the API rather than connection setup
+        with httpx.Client(http2=True, headers=headers, timeout=60.0) as client:
+            response = client.post(
+                "https://api.anthropic.com/v1/messages",
+                json=data
+            )
         
         print("\nAPI Response Details:")
         print(f"Status Code: {response.status_code}")
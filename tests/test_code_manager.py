@@ -0,0 +1,63 @@
+import asyncio
+
+from src.code_manager import CodeManager
+from src.project_manager import ProjectManager
+
+
+def _code_manager(tmp_path):
+    project_manager = ProjectManager(str(tmp_path))
+    project_manager.create_project("demo")
+    return CodeManager(project_manager)
+
+
+def test_create_file_routes_python_test_modules_to_tests(tmp_path):
+    manager = _code_manager(tmp_path)
+    project = manager.project_manager.get_current_project()
+    cases = {
+        "test_app.py": project / "tests" / "test_app.py",
+        "app_test.py": project / "tests" / "app_test.py",
+        "pkg/test_models.py": project / "tests" / "pkg" / "test_models.py",
+        "app.py": project / "src" / "app.py",
+        "contest.py": project / "src" / "contest.py",
+        "test_data.json": project / "src" / "test_data.json",
+        "fixtures_test.txt": project / "src" / "fixtures_test.txt",
+    }
+    for file_name, expected in cases.items():
+        assert asyncio.run(manager.create_file(file_name)) == expected
+        assert expected.exists()
+    manager.project_manager.flush()
+
+
+def test_analyze_code_reuses_analysis_until_file_changes(tmp_path, monkeypatch):
+    manager = _code_manager(tmp_path)
+    source = manager.project_manager.get_current_project() / "src" / "app.py"
+    source.write_text("import os\n\nclass A:\n    def f(self):\n        pass\n")
+    parses = []
+    analyze_content = manager._analyze_content
+
+    def counting_analyze_content(content):
+        parses.append(content)
+        return analyze_content(content)
+
+    monkeypatch.setattr(manager, "_analyze_content", counting_analyze_content)
+    first = asyncio.run(manager.analyze_code("src/app.py"))
+    assert (first["classes"], first["functions"], first["imports"]) == (1, 1, 1)
+
+    # Callers get a copy, so changing it doesn't affect the cached analysis
+    first["classes"] = 99
+    assert asyncio.run(manager.analyze_code("src/app.py"))["classes"] == 1
+    assert len(parses) == 1
+
+    source.write_text("def g():\n    pass\n\ndef h():\n    pass\n")
+    changed = asyncio.run(manager.analyze_code("src/app.py"))
+    assert (changed["classes"], changed["functions"]) == (0, 2)
+    assert len(parses) == 2
+
+
+def test_analyze_code_handles_empty_file(tmp_path):
+    manager = _code_manager(tmp_path)
+    source = manager.project_manager.get_current_project() / "src" / "empty.py"
+    source.write_text("")
+    analysis = asyncio.run(manager.analyze_code("src/empty.py"))
+    assert analysis["content"] == ""
+    assert (analysis["classes"], analysis["functions"], analysis["imports"]) == (0, 0, 0)
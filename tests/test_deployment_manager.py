@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+
+from src.deployment_manager import DeploymentManager, STATUS_HISTORY_SIZE
+from src.utils import json_utils
+
+
+def _manager(tmp_path):
+    (tmp_path / "deployments").mkdir()
+    return DeploymentManager(str(tmp_path))
+
+
+def test_status_is_parsed_once_while_file_is_unchanged(tmp_path, monkeypatch):
+    manager = _manager(tmp_path)
+    manager.status_file.write_text(json.dumps({"dev": {"current": {"id": 1}, "history": [{"id": 1}]}}))
+    reads = []
+    read_json = json_utils.read_json
+
+    def counting_read_json(path):
+        reads.append(path)
+        return read_json(path)
+
+    monkeypatch.setattr(json_utils, "read_json", counting_read_json)
+    first = manager._read_status()
+    assert manager._read_status() is first
+    assert len(reads) == 1
+
+
+def test_status_is_reloaded_when_file_changes(tmp_path):
+    manager = _manager(tmp_path)
+    manager.status_file.write_text(json.dumps({"dev": {"current": {"id": 1}, "history": []}}))
+    assert manager._read_status()["dev"]["current"] == {"id": 1}
+
+    manager.status_file.write_text(json.dumps({"dev": {"current": {"id": 2}, "history": []}}))
+    stat = manager.status_file.stat()
+    os.utime(manager.status_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert manager._read_status()["dev"]["current"] == {"id": 2}
+
+    manager.status_file.unlink()
+    assert manager._read_status() is None
+
+
+def test_update_keeps_cache_in_sync_with_file(tmp_path):
+    manager = _manager(tmp_path)
+    manager._update_deployment_status("dev", {"id": 1})
+    manager._update_deployment_status("prod", {"id": 2})
+
+    on_disk = json.loads(manager.status_file.read_text())
+    assert on_disk["dev"] == {"current": {"id": 1}, "history": [{"id": 1}]}
+    assert on_disk["prod"] == {"current": {"id": 2}, "history": [{"id": 2}]}
+    assert DeploymentManager(str(tmp_path))._read_status()["prod"]["current"] == {"id": 2}
+
+
+def test_history_keeps_only_recent_deployments(tmp_path):
+    manager = _manager(tmp_path)
+    for i in range(STATUS_HISTORY_SIZE + 3):
+        manager._update_deployment_status("dev", {"id": i})
+
+    expected = [{"id": i} for i in range(3, STATUS_HISTORY_SIZE + 3)]
+    assert json.loads(manager.status_file.read_text())["dev"]["history"] == expected
+
+    # A fresh manager loading the file keeps trimming the history
+    reloaded = DeploymentManager(str(tmp_path))
+    reloaded._update_deployment_status("dev", {"id": "new"})
+    assert list(reloaded._read_status()["dev"]["history"]) == expected[1:] + [{"id": "new"}]
+
+
+def test_deployment_status_is_a_detached_copy(tmp_path):
+    manager = _manager(tmp_path)
+    manager._update_deployment_status("dev", {"id": 1})
+
+    status = asyncio.run(manager.get_deployment_status())
+    assert status == {"dev": {"current": {"id": 1}, "history": [{"id": 1}]}}
+    assert type(status["dev"]["history"]) is list
+
+    status["dev"]["history"].append({"id": 2})
+    status["dev"]["current"] = None
+    status["prod"] = {}
+    assert asyncio.run(manager.get_deployment_status()) == {
+        "dev": {"current": {"id": 1}, "history": [{"id": 1}]}
+    }
@@ -0,0 +1,60 @@
+import os
+import pytest
+
+from src.utils.file_utils import parallel_copytree
+
+
+def test_copies_full_tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "pkg" / "sub").mkdir(parents=True)
+    (src / "empty").mkdir()
+    (src / "main.py").write_text("print('hi')\n")
+    (src / "pkg" / "__init__.py").write_text("")
+    (src / "pkg" / "sub" / "data.bin").write_bytes(bytes(range(256)) * 64)
+
+    dst = parallel_copytree(src, tmp_path / "dst", max_workers=4)
+
+    assert dst == tmp_path / "dst"
+    assert (dst / "empty").is_dir()
+    copied = sorted(p.relative_to(dst) for p in dst.rglob("*"))
+    assert copied == sorted(p.relative_to(src) for p in src.rglob("*"))
+    for path in src.rglob("*"):
+        if path.is_file():
+            assert (dst / path.relative_to(src)).read_bytes() == path.read_bytes()
+
+
+def test_reraises_copy_error(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(5):
+        (src / f"file{i}.txt").write_text(str(i))
+
+    def failing_copy(file_src, file_dst):
+        if file_src.endswith("file3.txt"):
+            raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        parallel_copytree(src, tmp_path / "dst", copy_function=failing_copy)
+
+
+def test_refuses_existing_destination(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "dst").mkdir()
+    with pytest.raises(FileExistsError):
+        parallel_copytree(tmp_path / "src", tmp_path / "dst")
+
+
+def test_reraises_unreadable_directory(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    (src / "locked").mkdir(parents=True)
+    (src / "locked" / "secret.txt").write_text("x")
+    scandir = os.scandir
+
+    def failing_scandir(path="."):
+        if os.path.basename(path) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    with pytest.raises(PermissionError):
+        parallel_copytree(src, tmp_path / "dst")
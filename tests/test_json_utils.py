@@ -0,0 +1,40 @@
+import json
+
+from src.utils.json_utils import ObjectSplitter
+
+
+def test_splits_objects_from_fenced_array():
+    text = '```json\n[\n  {"type": "create_file", "id": 1},\n  {"type": "run_tests", "id": 2}\n]\n```'
+    objects = ObjectSplitter().feed(text)
+    assert [json.loads(obj) for obj in objects] == [
+        {"type": "create_file", "id": 1},
+        {"type": "run_tests", "id": 2},
+    ]
+
+
+def test_ignores_braces_and_escaped_quotes_in_strings():
+    first = '{"content": "def f():\\n    return {\\"a\\": [1, 2]}", "note": "} ] {"}'
+    second = '{"path": "C:\\\\dir\\\\"}'
+    objects = ObjectSplitter().feed(f"[{first}, {second}]")
+    assert objects == [first, second]
+    assert json.loads(objects[0])["content"] == 'def f():\n    return {"a": [1, 2]}'
+    assert json.loads(objects[1])["path"] == "C:\\dir\\"
+
+
+def test_handles_chunk_boundaries_mid_escape():
+    text = '[{"content": "say \\"hi\\" {", "path": "a\\\\"}, {"id": 2}]'
+    splitter = ObjectSplitter()
+    objects = []
+    for ch in text:
+        objects.extend(splitter.feed(ch))
+    assert objects == ObjectSplitter().feed(text)
+    assert [json.loads(obj) for obj in objects] == [
+        {"content": 'say "hi" {', "path": "a\\"},
+        {"id": 2},
+    ]
+
+
+def test_returns_nothing_until_object_is_complete():
+    splitter = ObjectSplitter()
+    assert splitter.feed('[{"id": 1, "nested": {"a": ') == []
+    assert splitter.feed('1}}') == ['{"id": 1, "nested": {"a": 1}}']
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.utils.plan_steps import group_steps, run_plan
+
+
+def _ids(groups):
+    return [[step["id"] for step in group] for group in groups]
+
+
+def test_groups_consecutive_steps_with_same_parallel_group():
+    steps = [
+        {"id": 1, "parallel_group": "a"},
+        {"id": 2, "parallel_group": "a"},
+        {"id": 3, "parallel_group": "b"},
+        {"id": 4, "parallel_group": "b"},
+    ]
+    assert _ids(group_steps(steps)) == [[1, 2], [3, 4]]
+
+
+def test_repeated_group_after_another_group_is_not_merged():
+    steps = [
+        {"id": 1, "parallel_group": "a"},
+        {"id": 2, "parallel_group": "b"},
+        {"id": 3, "parallel_group": "a"},
+    ]
+    assert _ids(group_steps(steps)) == [[1], [2], [3]]
+
+
+def test_steps_without_parallel_group_run_alone():
+    steps = [
+        {"id": 1},
+        {"id": 2},
+        {"id": 3, "parallel_group": None},
+        {"id": 4, "parallel_group": "a"},
+        {"id": 5},
+        {"id": 6, "parallel_group": "a"},
+    ]
+    assert _ids(group_steps(steps)) == [[1], [2], [3], [4], [5], [6]]
+
+
+def test_empty_plan():
+    assert group_steps([]) == []
+
+
+def test_run_plan_runs_groups_in_order_and_group_steps_concurrently():
+    steps = [
+        {"id": 1, "parallel_group": "a"},
+        {"id": 2, "parallel_group": "a"},
+        {"id": 3},
+    ]
+    events = []
+
+    async def execute_step(step):
+        events.append(("start", step["id"]))
+        await asyncio.sleep(0)
+        events.append(("end", step["id"]))
+
+    asyncio.run(run_plan(steps, execute_step))
+    assert events == [
+        ("start", 1), ("start", 2), ("end", 1), ("end", 2),
+        ("start", 3), ("end", 3),
+    ]
+
+
+def test_run_plan_stops_after_failing_group():
+    steps = [{"id": 1}, {"id": 2}]
+    executed = []
+
+    async def execute_step(step):
+        executed.append(step["id"])
+        raise RuntimeError("step failed")
+
+    with pytest.raises(RuntimeError, match="step failed"):
+        asyncio.run(run_plan(steps, execute_step))
+    assert executed == [1]
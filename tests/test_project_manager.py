@@ -0,0 +1,19 @@
+from src.project_manager import ProjectManager
+
+
+def test_safe_name_matches_per_character_sanitizing(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    names = ["My App", "../../etc", "a/b\\c", "naïve-café", "日本語 app", "tab\tname", "ok123", ""]
+    for name in names:
+        expected = "".join(c if c.isalnum() else "_" for c in name)
+        assert manager._safe_name(name) == expected
+        # Lookups filled in by earlier names give the same result
+        assert manager._safe_name(name) == expected
+
+
+def test_safe_name_keeps_project_inside_projects_dir(tmp_path):
+    manager = ProjectManager(str(tmp_path))
+    project_dir = manager.create_project("../Demo App!")
+    assert project_dir == manager.projects_dir / "___Demo_App_"
+    assert manager.load_project("../Demo App!") == project_dir
+    manager.flush()
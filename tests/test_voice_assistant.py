@@ -0,0 +1,61 @@
+import json
+
+import src.voice_assistant as voice_assistant
+from src.voice_assistant import VoiceCodingAssistant
+
+
+def _assistant(tmp_path):
+    return VoiceCodingAssistant("test-key", str(tmp_path), "hey assistant")
+
+
+def _open_history(assistant):
+    # Same as start(), without the voice and text input loops
+    assistant.history_file.parent.mkdir(exist_ok=True)
+    assistant._history_fh = open(assistant.history_file, 'ab', buffering=8192)
+
+
+def _read_history(assistant):
+    with open(assistant.history_file) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_history_is_appended_as_jsonl_across_sessions(tmp_path):
+    entries = [{"timestamp": "t", "type": "text", "command": f"create file {i}.py"} for i in range(3)]
+
+    assistant = _assistant(tmp_path)
+    _open_history(assistant)
+    for entry in entries[:2]:
+        assistant._record_history(entry)
+    assistant._save_history()
+    assert assistant._history_fh is None
+    assert _read_history(assistant) == entries[:2]
+
+    assistant = _assistant(tmp_path)
+    _open_history(assistant)
+    assistant._record_history(entries[2])
+    assert assistant.history == entries[2:]
+    assistant._save_history()
+    assert _read_history(assistant) == entries
+
+
+def test_save_history_compacts_to_history_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(voice_assistant, "HISTORY_LIMIT", 5)
+    entries = [{"timestamp": "t", "type": "voice", "command": f"run tests {i}"} for i in range(8)]
+
+    assistant = _assistant(tmp_path)
+    _open_history(assistant)
+    for entry in entries:
+        assistant._record_history(entry)
+    assistant._save_history()
+    assert _read_history(assistant) == entries[-5:]
+    assert not assistant.history_file.with_suffix('.jsonl.tmp').exists()
+
+    # Saving again without new commands leaves the file as it is
+    assistant._save_history()
+    assert _read_history(assistant) == entries[-5:]
+
+
+def test_save_history_without_history_file(tmp_path):
+    assistant = _assistant(tmp_path)
+    assistant._save_history()
+    assert not assistant.history_file.exists()